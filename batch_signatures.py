@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+"""
+Batch Import Signature Detector
+
+Finds spans of a listen history that look like bulk imports or
+timestamp corruption rather than real listening:
+
+- collision:    runs of identical timestamps
+- progression:  runs of listens spaced exactly the same number of
+                seconds apart (e.g. every 1s or every 180s)
+- importer:     runs of consecutive listens submitted by a known
+                importer client
+
+The detector is a single linear scan over the sorted timestamp array
+and the parallel client IDs (see ListenColumns). Its state is a plain,
+JSON-serializable dict, so an incremental audit can carry open runs
+over to the next batch of listens and report the same spans as a full
+scan.
+
+Each span is reported with its size, time range, step and dominant
+submission client.
+"""
+
+from collections import Counter
+
+MIN_COLLISION = 3       # listens sharing one timestamp
+MIN_PROGRESSION = 10    # listens with identical gaps
+MIN_IMPORTER = 25       # consecutive listens from an importer client
+
+# Case-insensitive substrings of submission_client names
+KNOWN_IMPORTERS = (
+    "import",
+    "prune-scrobbles",
+    "ytm-extractor",
+    "elbisaur",
+)
+
+
+def is_importer(client):
+    client = (client or "").lower()
+    return any(name in client for name in KNOWN_IMPORTERS)
+
+
+def new_scan():
+    """Empty scanner state."""
+    return {
+        "prev_ts": None,
+        "prev_client": None,
+        # Open equal-gap run: listens from start to end, step seconds apart
+        "run": None,
+        # Open run of importer listens
+        "importer_run": None,
+        "spans": [],
+    }
+
+
+def _span(kind, size, start, end, step, clients):
+    client, count = max(clients.items(), key=lambda item: (item[1], item[0]))
+    return {
+        "kind": kind,
+        "size": size,
+        "start": start,
+        "end": end,
+        "step": step,
+        "dominant_client": client,
+        "dominant_share": round(count / size, 3),
+    }
+
+
+def _merge(carried, names):
+    clients = Counter(carried)
+    clients.update(names)
+    return dict(clients)
+
+
+def _run_span(run, clients):
+    if run["step"] == 0 and run["size"] >= MIN_COLLISION:
+        return _span("collision", run["size"], run["start"], run["end"], 0, clients)
+    if run["step"] and run["size"] >= MIN_PROGRESSION:
+        return _span("progression", run["size"], run["start"], run["end"], run["step"], clients)
+    return None
+
+
+def scan_signatures(scan, timestamps, client_ids, client_names):
+    """
+    Feed the next listens (sorted, all newer than earlier feeds) into scan.
+
+    client_ids index into client_names; an empty name counts as "None".
+    Closed spans are appended to scan["spans"].
+    """
+    names = [name or "None" for name in client_names]
+    importer_ids = {i for i, name in enumerate(client_names) if is_importer(name)}
+    spans = scan["spans"]
+
+    def client_names_of(start, end):
+        return [names[client_id] for client_id in client_ids[start:end]]
+
+    prev_ts = scan["prev_ts"]
+    run = scan["run"] or {"start": None, "end": None, "step": None, "size": 0, "clients": {}}
+    run_from = 0
+    step = run["step"]
+    size = run["size"]
+
+    importer = scan["importer_run"]
+    importer_from = 0
+
+    for i, ts in enumerate(timestamps):
+        # Equal-gap runs (step 0 = collisions)
+        if prev_ts is not None:
+            delta = ts - prev_ts
+            if delta == step:
+                size += 1
+            else:
+                run["size"], run["end"] = size, prev_ts
+                if (step == 0 and size >= MIN_COLLISION) or (step and size >= MIN_PROGRESSION):
+                    clients = _merge(run["clients"], client_names_of(run_from, i))
+                    spans.append(_run_span(run, clients))
+                # The new run starts at the previous listen
+                if i:
+                    run = {"start": prev_ts, "step": delta, "clients": {}}
+                    run_from = i - 1
+                else:
+                    run = {"start": prev_ts, "step": delta, "clients": {scan["prev_client"]: 1}}
+                    run_from = 0
+                step = delta
+                size = 2
+        else:
+            run = {"start": ts, "step": None, "clients": {}}
+            run_from = i
+            size = 1
+        prev_ts = ts
+
+        # Importer client runs
+        if client_ids[i] in importer_ids:
+            if importer is None:
+                importer = {"start": ts, "size": 0, "clients": {}}
+                importer_from = i
+            importer["size"] += 1
+            importer["end"] = ts
+        elif importer is not None:
+            if importer["size"] >= MIN_IMPORTER:
+                clients = _merge(importer["clients"], client_names_of(importer_from, i))
+                spans.append(_span("importer", importer["size"], importer["start"], importer["end"], None, clients))
+            importer = None
+
+    n = len(timestamps)
+    if n:
+        run["size"], run["end"] = size, prev_ts
+        run["clients"] = _merge(run["clients"], client_names_of(run_from, n))
+        if importer is not None:
+            importer["clients"] = _merge(importer["clients"], client_names_of(importer_from, n))
+        scan["run"] = run
+        scan["importer_run"] = importer
+        scan["prev_ts"] = prev_ts
+        scan["prev_client"] = names[client_ids[n - 1]]
+
+    return scan
+
+
+def finish_scan(scan):
+    """All spans found so far, including runs still open, largest first."""
+    spans = list(scan["spans"])
+
+    run = scan["run"]
+    if run is not None:
+        span = _run_span(run, run["clients"])
+        if span:
+            spans.append(span)
+
+    importer = scan["importer_run"]
+    if importer is not None and importer["size"] >= MIN_IMPORTER:
+        spans.append(_span(
+            "importer", importer["size"], importer["start"], importer["end"], None, importer["clients"]
+        ))
+
+    spans.sort(key=lambda s: (-s["size"], s["start"], s["kind"]))
+    return spans
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+"""
+Scale Benchmark
+
+Times the filter scripts and both audit analyzers against synthetic
+data (see synthetic_listens.py) at one or more sizes and appends the
+results to a JSON Lines file so runs can be compared across versions.
+
+For each size it generates, in a working directory per size:
+
+- Streaming_History_Audio_*.json    for spotify_filter.py
+- watch-history.html                for ytm_filter_music_and_topic.py
+- music-and-topic-history.html      (its output) for the YTM skip filters
+- USER_full.json                    for both audit analyzers
+
+Each script runs as a separate process. Recorded per run:
+
+- Wall time, user and system CPU time
+- Throughput (generated records per wall-clock second)
+- Peak RSS of the script's process
+- Exit code, git revision, Python version
+
+Usage:
+    python benchmark.py --sizes 10000 100000 1000000
+
+Optional:
+    --scripts audit_v2 spotify       # only run these benchmarks
+    --results benchmark_results.jsonl
+    --workdir bench_data             # generated inputs are reused between runs
+    --label "before sort change"     # free-form tag stored with each result
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, UTC
+
+from synthetic_listens import generate_listenbrainz, generate_spotify, generate_ytm
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SPOTIFY_FILES = [
+    "Streaming_History_Audio_2018-2020_0.json",
+    "Streaming_History_Audio_2020-2024_1.json",
+]
+
+# name -> (command, required input)
+BENCHMARKS = {
+    "spotify": (["spotify_filter.py"], "Streaming_History_Audio_2018-2020_0.json"),
+    "ytm_music_and_topic": (["ytm_filter_music_and_topic.py"], "watch-history.html"),
+    "ytm_filter_30s": (["ytm_filter_30s_skips.py"], "music-and-topic-history.html"),
+    "ytm_remove_30s": (["ytm_remove_30s_skips.py"], "music-and-topic-history.html"),
+    "ytm_remove_60s": (["ytm_remove_60s_skips.py"], "music-and-topic-history.html"),
+    "audit": (["listenbrainz_audit_analyzer.py", "USER_full.json", "--near-window", "10"], "USER_full.json"),
+    "audit_v2": (["listenbrainz_audit_v2.py", "USER_full.json", "--near-window", "60"], "USER_full.json"),
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def prepare_inputs(workdir, size, seed, rates):
+    """Generate inputs for one size unless they already exist."""
+    os.makedirs(workdir, exist_ok=True)
+    marker = os.path.join(workdir, "inputs.json")
+    params = {"size": size, "seed": seed, **rates}
+
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if json.load(f) == params:
+                return
+
+    print(f"Generating {size} records per format in {workdir}...")
+
+    half = size // 2
+    generate_spotify(os.path.join(workdir, SPOTIFY_FILES[0]), half, seed, **rates)
+    generate_spotify(os.path.join(workdir, SPOTIFY_FILES[1]), size - half, seed + 100, **rates)
+    generate_ytm(os.path.join(workdir, "watch-history.html"), size, seed, **rates)
+    generate_listenbrainz(os.path.join(workdir, "USER_full.json"), size, seed, user="USER", **rates)
+
+    # The YTM skip filters read the music-and-topic output
+    run_script(BENCHMARKS["ytm_music_and_topic"][0], workdir)
+
+    with open(marker, "w") as f:
+        json.dump(params, f)
+
+
+def run_script(command, workdir):
+    """Run one script to completion and return (exit code, wall s, rusage)."""
+    args = [sys.executable, os.path.join(REPO_DIR, command[0]), *command[1:]]
+
+    # stderr goes to a file rather than a pipe, which would block a chatty
+    # script once the pipe buffer fills while we wait for it
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen(args, cwd=workdir, stdout=subprocess.DEVNULL, stderr=stderr)
+        _, status, usage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if proc.returncode:
+            stderr.seek(0)
+            print(stderr.read().decode(errors="replace"), file=sys.stderr)
+
+    return proc.returncode, wall, usage
+
+
+def peak_rss_mb(usage):
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss * scale / 1024 / 1024, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the filter and audit scripts on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="Record counts to benchmark")
+    parser.add_argument("--scripts", nargs="+", choices=sorted(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument("--results", default="benchmark_results.jsonl", help="JSON Lines results file (appended)")
+    parser.add_argument("--workdir", default="bench_data", help="Directory for generated inputs")
+    parser.add_argument("--label", help="Free-form tag stored with each result")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generators")
+    parser.add_argument("--dup-rate", type=float, default=0.01, help="Exact duplicate rate")
+    parser.add_argument("--skip-rate", type=float, default=0.15, help="Skip (<30s played) rate")
+    parser.add_argument("--burst-rate", type=float, default=0.02, help="Rapid burst (0-5s gap) rate")
+    args = parser.parse_args()
+
+    rates = {"dup_rate": args.dup_rate, "skip_rate": args.skip_rate, "burst_rate": args.burst_rate}
+    names = args.scripts or list(BENCHMARKS)
+    revision = git_revision()
+    run_at = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    print(f"{'Benchmark':20} {'Records':>10} {'Wall s':>9} {'CPU s':>9} {'Records/s':>11} {'Peak RSS MB':>12}")
+
+    with open(args.results, "a") as results:
+        for size in args.sizes:
+            workdir = os.path.join(args.workdir, str(size))
+            prepare_inputs(workdir, size, args.seed, rates)
+
+            for name in names:
+                command, required = BENCHMARKS[name]
+                if not os.path.exists(os.path.join(workdir, required)):
+                    print(f"{name:20} {size:>10} missing input: {required}")
+                    continue
+
+                code, wall, usage = run_script(command, workdir)
+                cpu = usage.ru_utime + usage.ru_stime
+
+                record = {
+                    "benchmark": name,
+                    "records": size,
+                    "exit_code": code,
+                    "wall_s": round(wall, 4),
+                    "user_s": round(usage.ru_utime, 4),
+                    "sys_s": round(usage.ru_stime, 4),
+                    "records_per_s": round(size / wall) if wall else None,
+                    "peak_rss_mb": peak_rss_mb(usage),
+                    "revision": revision,
+                    "label": args.label,
+                    "python": platform.python_version(),
+                    "run_at": run_at,
+                }
+                results.write(json.dumps(record) + "\n")
+                results.flush()
+
+                status = "" if code == 0 else f"  (exit {code})"
+                print(
+                    f"{name:20} {size:>10} {wall:>9.3f} {cpu:>9.3f} "
+                    f"{record['records_per_s']:>11} {record['peak_rss_mb']:>12}{status}"
+                )
+
+    print(f"\nResults appended to: {args.results}")
+
+
+if __name__ == "__main__":
+    main()
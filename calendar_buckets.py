@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+
+"""
+Calendar Bucketing Engine
+
+Maps UNIX timestamps to calendar buckets (year, month, week, day of
+week, hour of day) in a configurable user timezone without building a
+datetime for every listen.
+
+How it works:
+
+- Local month starts from 1900 to 2200 are precomputed as UNIX
+  timestamps; year and month come from one binary search on the raw
+  timestamp, with no localization at all. Timestamps outside that
+  range (e.g. corrupt negative ones) have no year or month bucket.
+- The timezone's UTC offsets are precomputed as a transition table over
+  the span of the data; week, day of week and hour of day localize a
+  timestamp with one binary search (or a single addition for
+  fixed-offset zones such as UTC) and then use plain arithmetic.
+- ISO week labels are cached per week.
+
+bucket_stats() works on a sorted timestamp array: bucket boundaries
+are located by binary search and each bucket's artists are counted
+from a slice, producing per-bucket listen counts and artist counters
+(for entropy) without per-listen Python work.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, UTC
+from itertools import repeat
+from zoneinfo import ZoneInfo
+
+BUCKET_KINDS = ("year", "month", "week", "dow", "hour")
+DOW_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+EPOCH_DATE = date(1970, 1, 1)
+FIRST_YEAR = 1900
+LAST_YEAR = 2200
+DAY = 86400
+
+
+def _month_table(tz):
+    """UNIX timestamps of local month starts, with year and "YYYY-MM" labels."""
+    starts = []
+    years = []
+    labels = []
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        for month in range(1, 13):
+            starts.append(int(datetime(year, month, 1, tzinfo=tz).timestamp()))
+            years.append(year)
+            labels.append(f"{year}-{month:02d}")
+    return starts, years, labels
+
+
+def _offset_table(tz, start_ts, end_ts):
+    """
+    UTC offset transitions of tz between start_ts and end_ts.
+
+    Returns (transition timestamps, offsets in seconds). The offset is
+    sampled once per day; where it changes, the exact second of the
+    transition is found by bisection.
+    """
+    def offset_at(ts):
+        return int(datetime.fromtimestamp(ts, tz).utcoffset().total_seconds())
+
+    transitions = [start_ts]
+    offsets = [offset_at(start_ts)]
+
+    ts = start_ts
+    while ts < end_ts:
+        next_ts = min(ts + DAY, end_ts)
+        offset = offset_at(next_ts)
+        if offset != offsets[-1]:
+            lo, hi = ts, next_ts
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if offset_at(mid) == offsets[-1]:
+                    lo = mid
+                else:
+                    hi = mid
+            transitions.append(hi)
+            offsets.append(offset)
+        ts = next_ts
+
+    return transitions, offsets
+
+
+class CalendarBucketer:
+    """
+    Timestamp -> calendar bucket lookups for one timezone.
+
+    start_ts/end_ts bound the offset table; timestamps outside the span
+    use the offset at the nearest end. Without a span the table covers
+    1970 to a year from now.
+    """
+
+    def __init__(self, tz="UTC", start_ts=None, end_ts=None):
+        self.tz_name = tz
+        self.tz = UTC if tz in (None, "UTC") else ZoneInfo(tz)
+
+        if self.tz is UTC:
+            start_ts = end_ts = 0
+        elif start_ts is None or end_ts is None:
+            start_ts, end_ts = 0, int(datetime.now(UTC).timestamp()) + 366 * DAY
+
+        self._transitions, self._offsets = _offset_table(self.tz, start_ts, max(start_ts, end_ts))
+        self._fixed_offset = self._offsets[0] if len(self._offsets) == 1 else None
+        self._month_starts, self._month_years, self._month_labels = _month_table(self.tz)
+        self._table_end = int(datetime(LAST_YEAR + 1, 1, 1, tzinfo=self.tz).timestamp())
+        self._week_labels = {}
+
+    def local_seconds(self, ts):
+        if self._fixed_offset is not None:
+            return ts + self._fixed_offset
+        i = bisect_right(self._transitions, ts) - 1
+        return ts + self._offsets[max(i, 0)]
+
+    def _month_index(self, ts):
+        if not self._month_starts[0] <= ts < self._table_end:
+            raise ValueError(f"Timestamp {ts} is outside {FIRST_YEAR}-{LAST_YEAR}")
+        return bisect_right(self._month_starts, ts) - 1
+
+    def year(self, ts):
+        return self._month_years[self._month_index(ts)]
+
+    def month(self, ts):
+        return self._month_labels[self._month_index(ts)]
+
+    def _local_label(self, kind, day, seconds):
+        if kind == "week":
+            # Monday-based week number since the epoch (1970-01-01 was a Thursday)
+            week = (day + 3) // 7
+            label = self._week_labels.get(week)
+            if label is None:
+                iso = (EPOCH_DATE + timedelta(days=week * 7 - 3)).isocalendar()
+                label = f"{iso.year}-W{iso.week:02d}"
+                self._week_labels[week] = label
+            return label
+        if kind == "dow":
+            return (day + 3) % 7
+        if kind == "hour":
+            return seconds // 3600
+        raise ValueError(f"Unknown bucket kind: {kind}")
+
+    def _hour_segments(self, start_ts, end_ts):
+        """
+        Start timestamps and local seconds of every local hour touching
+        [start_ts, end_ts]. Offset transitions also start a segment, so
+        each segment has a single local hour.
+        """
+        transitions = self._transitions
+        offsets = self._offsets
+
+        bounds = []
+        local = []
+        i = max(bisect_right(transitions, start_ts) - 1, 0)
+        ts = start_ts
+
+        while ts <= end_ts:
+            offset = offsets[i]
+            segment_end = transitions[i + 1] if i + 1 < len(transitions) else end_ts + 1
+
+            bounds.append(ts)
+            local.append(ts + offset)
+
+            hour_ts = ts - (ts + offset) % 3600 + 3600
+            while hour_ts < segment_end and hour_ts <= end_ts:
+                bounds.append(hour_ts)
+                local.append(hour_ts + offset)
+                hour_ts += 3600
+
+            ts = max(segment_end, start_ts)
+            i += 1
+
+        return bounds, local
+
+    def segments(self, kind, start_ts, end_ts):
+        """
+        Bucket boundaries covering [start_ts, end_ts] as (start
+        timestamps, labels); consecutive segments have different labels.
+        "dow_hour" gives (day of week, hour) labels for heatmaps. Year and
+        month segments outside the month table are labelled None.
+        """
+        if kind in ("year", "month"):
+            starts = self._month_starts
+            lo = max(bisect_right(starts, start_ts) - 1, 0)
+            hi = bisect_right(starts, end_ts)
+            bounds = starts[lo:hi]
+            labels = (self._month_years if kind == "year" else self._month_labels)[lo:hi]
+            if start_ts < starts[0]:
+                bounds.insert(0, start_ts)
+                labels.insert(0, None)
+            if end_ts >= self._table_end:
+                bounds.append(self._table_end)
+                labels.append(None)
+        else:
+            bounds = []
+            labels = []
+            for ts, local in zip(*self._hour_segments(start_ts, end_ts)):
+                day, seconds = divmod(local, DAY)
+                if kind == "dow_hour":
+                    labels.append(((day + 3) % 7, seconds // 3600))
+                else:
+                    labels.append(self._local_label(kind, day, seconds))
+                bounds.append(ts)
+
+        merged_bounds = []
+        merged_labels = []
+        for ts, label in zip(bounds, labels):
+            if merged_labels and merged_labels[-1] == label:
+                continue
+            merged_bounds.append(ts)
+            merged_labels.append(label)
+
+        return merged_bounds, merged_labels
+
+    def bucket(self, ts, kind):
+        if kind == "year":
+            return self.year(ts)
+        if kind == "month":
+            return self.month(ts)
+        day, seconds = divmod(self.local_seconds(ts), DAY)
+        return self._local_label(kind, day, seconds)
+
+
+def bucket_stats(bucketer, timestamps, artists, kinds=BUCKET_KINDS, heatmap=False):
+    """
+    Per-bucket counts and artist counters for several bucket kinds.
+
+    timestamps must be sorted ascending; artists is the parallel list of
+    artist names (None or "" is counted but not attributed), or None to
+    only count listens. Listens outside the month table are left out of
+    the year and month buckets. Bucket
+    boundaries are located in the timestamp array by binary search and
+    each bucket's artists are counted from a slice, so there is no
+    per-listen Python work.
+
+    Returns (counts, artist_counts) where counts[kind] is a Counter of
+    bucket -> listens and artist_counts[kind][bucket] is a Counter of
+    artist -> listens. With heatmap=True a third value is returned: a
+    Counter keyed by (day of week, hour).
+    """
+    for kind in kinds:
+        if kind not in BUCKET_KINDS:
+            raise ValueError(f"Unknown bucket kind: {kind}")
+
+    counts = {kind: Counter() for kind in kinds}
+    artist_counts = {kind: defaultdict(Counter) for kind in kinds}
+    grid = Counter()
+
+    if not timestamps:
+        return (counts, artist_counts, grid) if heatmap else (counts, artist_counts)
+
+    n = len(timestamps)
+    start_ts, end_ts = timestamps[0], timestamps[-1]
+
+    def slices(bounds, labels):
+        """Yield (label, i, j) for each non-empty bucket; None-labelled segments are skipped."""
+        i = 0
+        for k in range(len(bounds)):
+            j = bisect_left(timestamps, bounds[k + 1]) if k + 1 < len(bounds) else n
+            if j > i and labels[k] is not None:
+                yield labels[k], i, j
+            i = j
+
+    for kind in kinds:
+        bounds, labels = bucketer.segments(kind, start_ts, end_ts)
+        bucket_counts = counts[kind]
+        bucket_artists = artist_counts[kind]
+
+        if artists is None:
+            for label, i, j in slices(bounds, labels):
+                bucket_counts[label] += j - i
+        elif len(bounds) * 8 < n:
+            # Few, large buckets: count each slice directly
+            for label, i, j in slices(bounds, labels):
+                bucket_counts[label] += j - i
+                bucket_artists[label].update(artists[i:j])
+        else:
+            # Many small buckets (hours, days): label every listen, then
+            # count (label, artist) pairs in one go
+            expanded = []
+            for label, i, j in slices(bounds, labels):
+                expanded.extend(repeat(label, j - i))
+            bucket_counts.update(expanded)
+            for (label, artist), count in Counter(zip(expanded, artists)).items():
+                bucket_artists[label][artist] = count
+
+    if heatmap:
+        for label, i, j in slices(*bucketer.segments("dow_hour", start_ts, end_ts)):
+            grid[label] += j - i
+
+    for bucket_artists in artist_counts.values():
+        for bucket in list(bucket_artists):
+            counter = bucket_artists[bucket]
+            counter.pop(None, None)
+            counter.pop("", None)
+            if not counter:
+                del bucket_artists[bucket]
+
+    if heatmap:
+        return counts, artist_counts, grid
+    return counts, artist_counts
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+"""
+Compressed I/O
+
+Transparent gzip/zstd reading and writing for exports and cleaned
+outputs, shared by the exporter, the analyzers and the filter scripts.
+
+Compression is chosen by file extension:
+
+- .gz            gzip (standard library)
+- .zst / .zstd   Zstandard (pip install zstandard)
+- anything else  plain UTF-8 text
+
+Files are decompressed as a stream, so a compressed file is never
+expanded on disk or held in memory as bytes.
+
+JSON files may be a single JSON document (e.g. USER_full.json.gz) or
+JSON Lines with one record per line (e.g. USER_full.jsonl.zst); JSON
+Lines is chosen by a .jsonl extension before the compression suffix and
+is parsed line by line.
+"""
+
+import gzip
+import io
+import json
+import os
+
+COMPRESSIONS = {
+    ".gz": "gzip",
+    ".zst": "zstd",
+    ".zstd": "zstd",
+}
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def compression_for(path):
+    """Compression name for path ("gzip", "zstd") or None."""
+    return COMPRESSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def strip_compression(path):
+    """path without its compression suffix."""
+    base, ext = os.path.splitext(path)
+    return base if ext.lower() in COMPRESSIONS else path
+
+
+def is_jsonl(path):
+    return strip_compression(path).lower().endswith(".jsonl")
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Reading or writing .zst files requires: pip install zstandard") from None
+    return zstandard
+
+
+def open_text(path, mode="r", compression="auto"):
+    """
+    Open path as UTF-8 text for reading ("r") or writing ("w").
+
+    compression defaults to the one implied by the extension; pass it
+    explicitly when writing to a temporary name such as "out.json.gz.tmp".
+    """
+    if compression == "auto":
+        compression = compression_for(path)
+
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=GZIP_LEVEL)
+
+    if compression == "zstd":
+        zstandard = _zstandard()
+        raw = open(path, mode + "b")
+        if mode == "r":
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+
+    return open(path, mode, encoding="utf-8")
+
+
+def _iter_json_array(f, chunk_size=1 << 20):
+    """
+    Yield the elements of a JSON array read from f, one chunk at a time.
+
+    Raises ValueError unless f holds exactly one well-formed array, so a
+    truncated file fails instead of yielding the records read so far.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def next_char():
+        """Skip whitespace; the next character, or "" at the end of the file."""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if eof:
+                return ""
+            read_more()
+
+    def next_value():
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A number at the end of the buffer may be cut short
+                if not eof and (end == len(buffer) or buffer[end] not in " \t\r\n,]"):
+                    raise ValueError
+            except ValueError:
+                if eof:
+                    raise
+                read_more()
+                continue
+            pos = end
+            return value
+
+    if next_char() != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+
+    char = next_char()
+    while char != "]":
+        if not char:
+            raise ValueError("Truncated JSON array: missing closing bracket")
+        yield next_value()
+
+        char = next_char()
+        if char == ",":
+            pos += 1
+            char = next_char()
+            if char == "]":
+                raise ValueError("Trailing comma in JSON array")
+        elif char and char != "]":
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {char!r}")
+    pos += 1
+
+    if next_char():
+        raise ValueError("Extra data after JSON array")
+
+
+def iter_json_records(path):
+    """
+    Yield the records of a JSON array or JSON Lines file.
+
+    Both formats are parsed incrementally, so only one record at a time
+    is held in memory.
+    """
+    with open_text(path) as f:
+        if is_jsonl(path):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f)
+
+
+def load_json(path):
+    """A JSON document, or the list of records of a JSON Lines file."""
+    if is_jsonl(path):
+        return list(iter_json_records(path))
+    with open_text(path) as f:
+        return json.load(f)
+
+
+def write_json(path, data, indent=None):
+    """
+    Write data to path (atomically), compressed and formatted by extension.
+
+    For JSON Lines, data must be a list of records.
+    """
+    temp_path = path + ".tmp"
+    with open_text(temp_path, "w", compression_for(path)) as f:
+        if is_jsonl(path):
+            for record in data:
+                f.write(json.dumps(record))
+                f.write("\n")
+        else:
+            json.dump(data, f, indent=indent)
+    os.replace(temp_path, path)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+Duration Distribution Index
+
+A cumulative histogram of play durations (ListenBrainz duration_ms or
+Spotify ms_played), built once and then queried for any threshold or
+set of buckets:
+
+- count_le(30)                 plays lasting at most 30 seconds
+- count_lt(30)                 plays shorter than 30 seconds
+- thresholds([5, 10, 30])      {5: n, 10: n, 30: n}
+- buckets([30, 60, 120])       counts for ≤30, 30–60, 60–120, >120
+
+Durations are counted per bin (ceil(ms / resolution_ms)); the distinct
+bins and their cumulative counts are kept as sorted lists, so each
+query is a binary search. With the default 1 ms resolution every answer
+is exact. A coarser resolution (e.g. 1000 ms, as stored in the audit v2
+state) keeps the histogram small and is exact for ≤ thresholds that are
+multiples of the bin width.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import accumulate
+
+# Default skip thresholds (seconds) of the audit reports
+SKIP_THRESHOLDS = [5, 10, 15, 30, 60, 90]
+
+# Upper edges (seconds) and labels of the duration distribution buckets
+DURATION_EDGES = [30, 60, 120, 240]
+DURATION_LABELS = ("≤30s", "31–60s", "61–120s", "121–240s", ">240s")
+
+
+class DurationIndex:
+    """Cumulative play-duration histogram answering threshold and bucket counts."""
+
+    def __init__(self, durations_ms=(), resolution_ms=1):
+        self.resolution_ms = resolution_ms
+        self._set_histogram(self.bin_counts(Counter(durations_ms), resolution_ms))
+
+    @classmethod
+    def from_histogram(cls, histogram, resolution_ms=1):
+        """Index over an existing {bin: count} histogram (see bin_counts)."""
+        index = cls.__new__(cls)
+        index.resolution_ms = resolution_ms
+        index._set_histogram(histogram)
+        return index
+
+    @staticmethod
+    def bin_counts(counts, resolution_ms):
+        """Rebin a {duration_ms: count} Counter to {ceil(ms / resolution_ms): count}."""
+        if resolution_ms == 1:
+            return counts
+        histogram = Counter()
+        for ms, count in counts.items():
+            histogram[-(-ms // resolution_ms)] += count
+        return histogram
+
+    def _set_histogram(self, histogram):
+        self.bins = sorted(histogram)
+        self.cumulative = list(accumulate(histogram[b] for b in self.bins))
+        self.total = self.cumulative[-1] if self.cumulative else 0
+
+    def __len__(self):
+        return self.total
+
+    def _count_before(self, position):
+        return self.cumulative[position - 1] if position else 0
+
+    def _bin(self, seconds):
+        # Rounded so 0.1s is 100 ms, not 100.00000000000001
+        return round(seconds * 1000, 6) / self.resolution_ms
+
+    def count_le(self, seconds):
+        """Plays lasting at most seconds."""
+        return self._count_before(bisect_right(self.bins, self._bin(seconds)))
+
+    def count_lt(self, seconds):
+        """Plays shorter than seconds."""
+        return self._count_before(bisect_left(self.bins, self._bin(seconds)))
+
+    def thresholds(self, seconds):
+        """{threshold: plays lasting at most threshold seconds}."""
+        return {t: self.count_le(t) for t in seconds}
+
+    def buckets(self, edges):
+        """
+        Counts for ≤edges[0], each (edges[i-1], edges[i]] and >edges[-1]
+        (len(edges) + 1 values).
+        """
+        counts = []
+        below = 0
+        for edge in edges:
+            at_most = self.count_le(edge)
+            counts.append(at_most - below)
+            below = at_most
+        counts.append(self.total - below)
+        return counts
+
+    def distribution(self, edges=DURATION_EDGES, labels=DURATION_LABELS):
+        """{label: count} of the non-empty buckets, or None without durations."""
+        if not self.total:
+            return None
+        return {label: count for label, count in zip(labels, self.buckets(edges)) if count}
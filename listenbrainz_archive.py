@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+
+"""
+ListenBrainz Binary Listen Archive
+
+Converts a ListenBrainz export JSON into a compact binary archive that
+the audit analyzers open with mmap, so an audit starts without parsing
+a multi-GB JSON file.
+
+Layout (native byte order, recorded in the header):
+
+HEADER (64 bytes)
+- Magic, format version, byte order, record count
+- Offsets of the artist, track and client string tables
+
+COLUMNS (one fixed-width value per listen, sorted by listened_at)
+- timestamp     int64
+- artist ID     uint32
+- track ID      uint32
+- duration_ms   uint32   (0 = missing)
+- MBID flag     uint8    (1 = recording_mbid present)
+- client ID     uint32
+
+STRING TABLES (deduplicated, ID 0 is always the empty string)
+- Artists:  artist_name
+- Tracks:   track_name plus the artist ID it was listened under
+- Clients:  submission_client
+
+Columns are exposed as memoryviews over the mapped file; nothing is
+decoded except the string tables.
+
+Usage:
+    python listenbrainz_archive.py USER_full.json USER_full.lbarch
+
+The analyzers accept the archive in place of the JSON export:
+    python listenbrainz_audit_v2.py USER_full.lbarch
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from compressed_io import load_json, strip_compression
+
+MAGIC = b"LBARCH\x00\x01"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIQQQQ")
+HEADER_SIZE = 64
+
+# name, array typecode
+COLUMNS = [
+    ("timestamps", "q"),
+    ("artist_ids", "I"),
+    ("track_ids", "I"),
+    ("durations", "I"),
+    ("mbid_flags", "B"),
+    ("client_ids", "I"),
+]
+
+BYTE_ORDERS = {"little": 0, "big": 1}
+MAX_UINT32 = 0xFFFFFFFF
+
+
+# --------------------------------------------------
+# Column View
+# --------------------------------------------------
+
+def _normalize(name):
+    return name.strip().lower()
+
+
+class ListenColumns:
+    """
+    Column view of a listen history, sorted by listened_at.
+
+    Columns are sequences of ints (lists, or memoryviews over an
+    archive). Artists, tracks and clients are IDs into the name tables;
+    ID 0 stands for a missing value.
+    """
+
+    def __init__(self, timestamps, artist_ids, track_ids, durations, mbid_flags, client_ids,
+                 artist_names, track_names, track_artists, client_names):
+        self.timestamps = timestamps
+        self.artist_ids = artist_ids
+        self.track_ids = track_ids
+        self.durations = durations
+        self.mbid_flags = mbid_flags
+        self.client_ids = client_ids
+        self.artist_names = artist_names
+        self.track_names = track_names
+        self.track_artists = track_artists
+        self.client_names = client_names
+        self._track_keys = None
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def track_keys(self):
+        """Normalized (artist, track) per track ID, as used for duplicate matching."""
+        if self._track_keys is None:
+            artists = [_normalize(name) for name in self.artist_names]
+            self._track_keys = [
+                (artists[artist_id], _normalize(name))
+                for name, artist_id in zip(self.track_names, self.track_artists)
+            ]
+        return self._track_keys
+
+    def tail(self, start):
+        """Columns from record index start onwards (zero-copy for archives)."""
+        if start == 0:
+            return self
+        view = ListenColumns(
+            *(getattr(self, name)[start:] for name, _ in COLUMNS),
+            self.artist_names, self.track_names, self.track_artists, self.client_names,
+        )
+        view._track_keys = self._track_keys
+        return view
+
+    def select(self, indices):
+        """Columns of the given record indices, in that order (copied into lists)."""
+        view = ListenColumns(
+            *([getattr(self, name)[i] for i in indices] for name, _ in COLUMNS),
+            self.artist_names, self.track_names, self.track_artists, self.client_names,
+        )
+        view._track_keys = self._track_keys
+        return view
+
+    def listen_key(self, i):
+        """(artist, track, client, duration_ms, has MBID) of record i, comparable across loads."""
+        track_id = self.track_ids[i]
+        return (
+            self.artist_names[self.track_artists[track_id]],
+            self.track_names[track_id],
+            self.client_names[self.client_ids[i]],
+            self.durations[i],
+            self.mbid_flags[i],
+        )
+
+    @classmethod
+    def from_listens(cls, data):
+        """Build columns from ListenBrainz export listens (JSON dicts)."""
+        data = sorted(data, key=lambda x: x["listened_at"])
+
+        artist_index = {"": 0}
+        track_index = {("", ""): 0}
+        client_index = {"": 0}
+
+        timestamps = []
+        artist_ids = []
+        track_ids = []
+        durations = []
+        mbid_flags = []
+        client_ids = []
+
+        for l in data:
+            meta = l.get("track_metadata", {})
+            add = meta.get("additional_info", {})
+            artist = meta.get("artist_name") or ""
+            track = meta.get("track_name") or ""
+            client = add.get("submission_client") or ""
+
+            artist_id = artist_index.setdefault(artist, len(artist_index))
+            track_id = track_index.setdefault((artist, track), len(track_index))
+
+            timestamps.append(l["listened_at"])
+            artist_ids.append(artist_id)
+            track_ids.append(track_id)
+            durations.append(min(max(int(add.get("duration_ms") or 0), 0), MAX_UINT32))
+            mbid_flags.append(1 if add.get("recording_mbid") else 0)
+            client_ids.append(client_index.setdefault(client, len(client_index)))
+
+        return cls(
+            timestamps, artist_ids, track_ids, durations, mbid_flags, client_ids,
+            list(artist_index),
+            [track for _, track in track_index],
+            [artist_index[artist] for artist, _ in track_index],
+            list(client_index),
+        )
+
+
+# --------------------------------------------------
+# Writing
+# --------------------------------------------------
+
+def _pad(f, alignment=8):
+    f.write(b"\0" * (-f.tell() % alignment))
+
+
+def _write_strings(f, names):
+    encoded = [name.encode("utf-8") for name in names]
+    offsets = array("Q", [0])
+    for item in encoded:
+        offsets.append(offsets[-1] + len(item))
+
+    f.write(struct.pack("<Q", len(encoded)))
+    offsets.tofile(f)
+    f.write(b"".join(encoded))
+    _pad(f)
+
+
+def write_archive(path, columns):
+    """Write ListenColumns to path (atomically)."""
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(b"\0" * HEADER_SIZE)
+
+        for name, typecode in COLUMNS:
+            array(typecode, getattr(columns, name)).tofile(f)
+            _pad(f)
+
+        artists_offset = f.tell()
+        _write_strings(f, columns.artist_names)
+
+        tracks_offset = f.tell()
+        _write_strings(f, columns.track_names)
+        array("I", columns.track_artists).tofile(f)
+        _pad(f)
+
+        clients_offset = f.tell()
+        _write_strings(f, columns.client_names)
+
+        f.seek(0)
+        f.write(HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            BYTE_ORDERS[sys.byteorder],
+            len(columns),
+            artists_offset,
+            tracks_offset,
+            clients_offset,
+        ))
+    os.replace(temp_path, path)
+
+
+# --------------------------------------------------
+# Reading
+# --------------------------------------------------
+
+def is_archive(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def open_archive(path):
+    """Map an archive and return its ListenColumns."""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, byte_order, count, artists_offset, tracks_offset, clients_offset = (
+        HEADER.unpack_from(mapped)
+    )
+    if magic != MAGIC:
+        raise ValueError(f"Not a listen archive: {path}")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported listen archive version: {version}")
+    swap = byte_order != BYTE_ORDERS[sys.byteorder]
+
+    view = memoryview(mapped)
+
+    def column(offset, typecode, length):
+        size = array(typecode).itemsize * length
+        data = view[offset:offset + size]
+        if swap:
+            values = array(typecode, data.tobytes())
+            values.byteswap()
+            return values
+        return data.cast(typecode)
+
+    def strings(offset):
+        """Decode a string table; returns (names, offset just past it)."""
+        (length,) = struct.unpack_from("<Q", mapped, offset)
+        offsets = column(offset + 8, "Q", length + 1)
+        start = offset + 8 + 8 * (length + 1)
+        names = [
+            str(view[start + offsets[i]:start + offsets[i + 1]], "utf-8")
+            for i in range(length)
+        ]
+        end = start + offsets[length]
+        return names, end + (-end % 8)
+
+    columns = []
+    offset = HEADER_SIZE
+    for _, typecode in COLUMNS:
+        columns.append(column(offset, typecode, count))
+        offset += array(typecode).itemsize * count
+        offset += -offset % 8
+
+    artist_names, _ = strings(artists_offset)
+    track_names, offset = strings(tracks_offset)
+    track_artists = column(offset, "I", len(track_names))
+    client_names, _ = strings(clients_offset)
+
+    return ListenColumns(*columns, artist_names, track_names, track_artists, client_names)
+
+
+def load_listens(path):
+    """ListenColumns from either a binary archive or an export JSON."""
+    if is_archive(path):
+        return open_archive(path)
+    return ListenColumns.from_listens(load_json(path))
+
+
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a ListenBrainz export JSON to a binary listen archive")
+    parser.add_argument("file", help="Path to export JSON")
+    parser.add_argument("output", nargs="?", help="Archive path (default: export name with .lbarch)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(strip_compression(args.file))[0] + ".lbarch"
+
+    data = load_json(args.file)
+
+    columns = ListenColumns.from_listens(data)
+    write_archive(output, columns)
+
+    print("\n===== ARCHIVE RESULTS =====")
+    print("Listens:  ", len(columns))
+    print("Artists:  ", len(columns.artist_names) - 1)
+    print("Tracks:   ", len(columns.track_names) - 1)
+    print("Clients:  ", len(columns.client_names) - 1)
+    print("Size:     ", f"{os.path.getsize(output) / 1024 / 1024:.1f} MB")
+    print("===========================")
+    print("Created:", output)
@@ -13,7 +13,7 @@ It calculates:
 - Exact duplicates
 - Top artists
 - Yearly distribution
-- Skip counts (≤5s, ≤10s, ≤15s, ≤30s, ≤60s, ≤90s)
+- Skip counts (≤5s, ≤10s, ≤15s, ≤30s, ≤60s, ≤90s, or any --skip-thresholds)
 - Duration distribution
 - Rapid burst detection (listens occurring within N seconds)
 
@@ -22,41 +22,32 @@ Usage:
 
 Optional:
     --near-window 10   # near duplicate window in seconds
+    --skip-thresholds 20 40 45     # skip counts for other thresholds (seconds)
+    --json report.json --csv report.csv --trend-db audit_trends.db
+    --profile [--cprofile PHASE]   # per-phase timing and memory
 """
 
-import json
 import argparse
 from collections import Counter
-from datetime import datetime, UTC
 import math
 
+from calendar_buckets import CalendarBucketer, bucket_stats
+from compressed_io import load_json
+from duration_index import SKIP_THRESHOLDS, DurationIndex
+from listenbrainz_archive import ListenColumns, is_archive, open_archive
+from listenbrainz_audit_report import add_output_arguments, emit_outputs
+from phase_profiler import NO_PROFILE, add_profile_arguments, profiler_from_args
+
 
 # ----------------------------
 # Helper Functions
 # ----------------------------
 
 def load_export(path):
-    """Load ListenBrainz export JSON file."""
-    with open(path) as f:
-        return json.load(f)
-
-
-def normalize_track_key(listen):
-    """
-    Create a normalized key for identifying duplicate tracks.
-    Uses artist + track name + timestamp.
-    """
-    meta = listen.get("track_metadata", {})
-    artist = meta.get("artist_name", "").strip().lower()
-    track = meta.get("track_name", "").strip().lower()
-    ts = listen.get("listened_at")
-
-    return (artist, track, ts)
-
-
-def get_year(ts):
-    """Convert UNIX timestamp to year (UTC, timezone-aware)."""
-    return datetime.fromtimestamp(ts, UTC).year
+    """Load ListenBrainz export JSON (optionally .gz/.zst or JSON Lines), or map a binary listen archive."""
+    if is_archive(path):
+        return open_archive(path)
+    return load_json(path)
 
 
 def shannon_entropy(counter):
@@ -75,158 +66,173 @@ def shannon_entropy(counter):
 # Main Analysis Function
 # ----------------------------
 
-def analyze(data, near_window=None):
-    print("Running audit analysis...\n")
+def analyze(data, near_window=None, profiler=NO_PROFILE, skip_thresholds=SKIP_THRESHOLDS):
+    """
+    Run the audit and return a structured result dict.
+
+    data is either a list of export listens or ListenColumns (for
+    example a mapped binary archive). skip_thresholds are in seconds.
+    """
 
-    total_listens = len(data)
-    print(f"Total listens: {total_listens}")
+    with profiler.phase("sort") as phase:
+        columns = data if isinstance(data, ListenColumns) else ListenColumns.from_listens(data)
+        phase.items = len(columns)
+
+    total_listens = len(columns)
 
     # ----------------------------
     # Exact Duplicate Detection
     # ----------------------------
 
-    seen = set()
-    duplicates = 0
+    with profiler.phase("dedup") as phase:
+        # Normalized artist + track name + timestamp
+        track_keys = columns.track_keys
+        tracks = [track_keys[track_id] for track_id in columns.track_ids]
 
-    for listen in data:
-        key = normalize_track_key(listen)
-        if key in seen:
-            duplicates += 1
-        else:
-            seen.add(key)
+        duplicates = total_listens - len(set(zip(tracks, columns.timestamps)))
 
-    print(f"Exact duplicates: {duplicates}")
-    print(f"Unique track events: {total_listens - duplicates}\n")
+        phase.items = total_listens
 
     # ----------------------------
     # Artist Statistics
     # ----------------------------
 
-    artist_counter = Counter()
-    year_counter = Counter()
-    durations = []
-    timestamps = []
+    with profiler.phase("diversity") as phase:
+        artist_counter = Counter()
+        for artist_id, count in Counter(columns.artist_ids).items():
+            if columns.artist_names[artist_id]:
+                artist_counter[columns.artist_names[artist_id]] += count
+
+        timestamps = [ts for ts in columns.timestamps if ts]
+        year_counter = Counter()
+        if timestamps:
+            bucketer = CalendarBucketer("UTC")
+            year_counter = bucket_stats(bucketer, timestamps, None, ("year",))[0]["year"]
+
+        entropy = shannon_entropy(artist_counter)
+        phase.items = total_listens
+
+    result = {
+        "analyzer": "audit",
+        "summary": {
+            "total_listens": total_listens,
+            "exact_duplicates": duplicates,
+            "integrity_score": None,
+            "mbid_coverage": None,
+        },
+        "total_listens": total_listens,
+        "exact_duplicates": duplicates,
+        "unique_track_events": total_listens - duplicates,
+        "unique_artists": len(artist_counter),
+        "artist_entropy": round(entropy, 4),
+        "top_artists": sorted(artist_counter.items(), key=lambda item: (-item[1], item[0]))[:20],
+        "year_distribution": {year: year_counter[year] for year in sorted(year_counter)},
+    }
 
-    for listen in data:
-        meta = listen.get("track_metadata", {})
-        artist = meta.get("artist_name")
-        ts = listen.get("listened_at")
+    # ----------------------------
+    # Skip Analysis
+    # ----------------------------
 
-        if artist:
-            artist_counter[artist] += 1
+    with profiler.phase("metadata") as phase:
+        # Duration metadata (if present); one index answers every threshold
+        duration_counts = Counter(columns.durations)
+        del duration_counts[0]
+        durations = DurationIndex.from_histogram(duration_counts)
 
-        if ts:
-            year_counter[get_year(ts)] += 1
-            timestamps.append(ts)
+        result["skip_counts"] = durations.thresholds(skip_thresholds)
 
-        # Duration metadata (if present)
-        duration_ms = meta.get("additional_info", {}).get("duration_ms")
-        if duration_ms:
-            durations.append(duration_ms / 1000)  # convert to seconds
+        # ----------------------------
+        # Duration Distribution
+        # ----------------------------
 
-    print("Unique artists:", len(artist_counter))
-    entropy = shannon_entropy(artist_counter)
-    print("Artist entropy:", round(entropy, 4), "\n")
+        result["duration_distribution"] = durations.distribution()
+
+        phase.items = len(durations)
 
     # ----------------------------
-    # Top Artists
+    # Rapid Burst Detection
     # ----------------------------
 
-    print("Top 20 Artists:")
-    for i, (artist, count) in enumerate(artist_counter.most_common(20), 1):
-        print(f"{i:2d}. {artist} - {count}")
-    print()
+    with profiler.phase("temporal") as phase:
+        result["rapid_bursts"] = None
 
-    # ----------------------------
-    # Year Distribution
-    # ----------------------------
+        if timestamps:
+            rapid_5 = 0
+            rapid_10 = 0
 
-    print("Year Distribution:")
-    for year in sorted(year_counter):
-        print(year, year_counter[year])
-    print()
+            for i in range(1, len(timestamps)):
+                delta = timestamps[i] - timestamps[i - 1]
+                if delta <= 5:
+                    rapid_5 += 1
+                if delta <= 10:
+                    rapid_10 += 1
 
-    # ----------------------------
-    # Skip Analysis
-    # ----------------------------
+            result["rapid_bursts"] = {"rapid_5s": rapid_5, "rapid_10s": rapid_10}
 
-    skip_thresholds = [5, 10, 15, 30, 60, 90]
-    skip_counts = {t: 0 for t in skip_thresholds}
+        # ----------------------------
+        # Near Duplicate Detection
+        # ----------------------------
 
-    for d in durations:
-        for threshold in skip_thresholds:
-            if d <= threshold:
-                skip_counts[threshold] += 1
+        result["near_window"] = near_window
+        result["near_duplicates"] = None
 
-    print("Skip Analysis (duration ≤ threshold):")
-    for t in skip_thresholds:
-        print(f"≤{t}s: {skip_counts[t]}")
-    print()
+        if near_window:
+            near_dupes = 0
+            all_timestamps = columns.timestamps
 
-    # ----------------------------
-    # Duration Distribution
-    # ----------------------------
+            for i in range(1, total_listens):
+                if abs(all_timestamps[i] - all_timestamps[i - 1]) <= near_window:
+                    if tracks[i] == tracks[i - 1]:
+                        near_dupes += 1
 
-    if durations:
-        duration_buckets = Counter()
-
-        for d in durations:
-            if d <= 30:
-                duration_buckets["≤30s"] += 1
-            elif d <= 60:
-                duration_buckets["31–60s"] += 1
-            elif d <= 120:
-                duration_buckets["61–120s"] += 1
-            elif d <= 240:
-                duration_buckets["121–240s"] += 1
-            else:
-                duration_buckets[">240s"] += 1
+            result["near_duplicates"] = near_dupes
 
-        print("Duration Distribution:")
-        for bucket, count in duration_buckets.items():
-            print(bucket, count)
-        print()
+        phase.items = len(timestamps)
 
-    # ----------------------------
-    # Rapid Burst Detection
-    # ----------------------------
+    return result
 
-    if timestamps:
-        timestamps.sort()
-        rapid_5 = 0
-        rapid_10 = 0
 
-        for i in range(1, len(timestamps)):
-            delta = timestamps[i] - timestamps[i - 1]
-            if delta <= 5:
-                rapid_5 += 1
-            if delta <= 10:
-                rapid_10 += 1
+def print_report(result):
+    """Print the human-readable report for an analyze() result."""
+    print("Running audit analysis...\n")
 
-        print("Rapid Burst Detection:")
-        print("≤5s gaps:", rapid_5)
-        print("≤10s gaps:", rapid_10)
-        print()
+    print(f"Total listens: {result['total_listens']}")
+    print(f"Exact duplicates: {result['exact_duplicates']}")
+    print(f"Unique track events: {result['unique_track_events']}\n")
 
-    # ----------------------------
-    # Near Duplicate Detection
-    # ----------------------------
+    print("Unique artists:", result["unique_artists"])
+    print("Artist entropy:", result["artist_entropy"], "\n")
+
+    print("Top 20 Artists:")
+    for i, (artist, count) in enumerate(result["top_artists"], 1):
+        print(f"{i:2d}. {artist} - {count}")
+    print()
 
-    if near_window:
-        print(f"Near duplicate detection (±{near_window}s window):")
+    print("Year Distribution:")
+    for year, count in result["year_distribution"].items():
+        print(year, count)
+    print()
 
-        near_dupes = 0
-        sorted_data = sorted(data, key=lambda x: x["listened_at"])
+    print("Skip Analysis (duration ≤ threshold):")
+    for t, count in result["skip_counts"].items():
+        print(f"≤{t}s: {count}")
+    print()
 
-        for i in range(1, len(sorted_data)):
-            curr = sorted_data[i]
-            prev = sorted_data[i - 1]
+    if result["duration_distribution"]:
+        print("Duration Distribution:")
+        for bucket, count in result["duration_distribution"].items():
+            print(bucket, count)
+        print()
 
-            if abs(curr["listened_at"] - prev["listened_at"]) <= near_window:
-                if normalize_track_key(curr)[:2] == normalize_track_key(prev)[:2]:
-                    near_dupes += 1
+    if result["rapid_bursts"]:
+        print("Rapid Burst Detection:")
+        print("≤5s gaps:", result["rapid_bursts"]["rapid_5s"])
+        print("≤10s gaps:", result["rapid_bursts"]["rapid_10s"])
+        print()
 
-        print("Near duplicates:", near_dupes)
+    if result["near_window"]:
+        print(f"Near duplicate detection (±{result['near_window']}s window):")
+        print("Near duplicates:", result["near_duplicates"])
         print()
 
     print("===== AUDIT COMPLETE =====")
@@ -240,8 +246,28 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="ListenBrainz Export Audit Analyzer")
     parser.add_argument("file", help="Path to ListenBrainz export JSON file")
     parser.add_argument("--near-window", type=int, help="Enable near duplicate detection with window (seconds)")
+    parser.add_argument(
+        "--skip-thresholds", type=int, nargs="+", default=SKIP_THRESHOLDS, metavar="SECONDS",
+        help="Skip analysis thresholds (default: 5 10 15 30 60 90)",
+    )
+    add_output_arguments(parser)
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
 
-    data = load_export(args.file)
-    analyze(data, args.near_window)
+    profiler = profiler_from_args(args)
+
+    with profiler.phase("load") as phase:
+        data = load_export(args.file)
+        phase.items = len(data)
+
+    result = analyze(data, args.near_window, profiler, args.skip_thresholds)
+    print_report(result)
+
+    if profiler.enabled:
+        result["profile"] = profiler.rows()
+
+    with profiler.phase("write"):
+        emit_outputs(args, result)
+
+    profiler.report()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+"""
+ListenBrainz Batch Audit
+
+Audits many ListenBrainz exports in one run, one account per worker
+process, and prints a line per account as soon as it finishes followed
+by a combined summary table.
+
+- Exports are given as files, directories or glob patterns. A directory
+  contributes its *_full.json / *_full.jsonl exports (optionally .gz,
+  .zst or .zstd) and *.lbarch archives. An export present in several
+  forms (e.g. USER_full.json and USER_full.lbarch) is audited once,
+  preferring the archive.
+- The worker pool defaults to one process per CPU. Workers are forked
+  from this process, so the analyzers are imported once; each worker
+  exits after one account, releasing that account's memory.
+- Per-account results can be written as JSON and recorded in the trend
+  store; the summary table can be written as CSV.
+
+Usage:
+    python listenbrainz_audit_batch.py exports/
+    python listenbrainz_audit_batch.py "exports/*_full.json.zst" --analyzer audit
+
+Optional:
+    --workers 8               # worker processes (default: CPU count)
+    --near-window 60          # near duplicate window in seconds
+    --timezone Europe/London  # audit_v2 calendar timezone
+    --output-dir reports      # write USER_audit.json per account
+    --trend-db audit.db       # record every account in the trend store
+    --csv summary.csv         # write the combined summary table
+"""
+
+import argparse
+import csv
+import glob
+import multiprocessing
+import os
+import sys
+import time
+
+import listenbrainz_audit_analyzer
+import listenbrainz_audit_v2
+from compressed_io import COMPRESSIONS, strip_compression, write_json
+from listenbrainz_archive import is_archive
+from listenbrainz_audit_report import record_trend, user_from_path
+
+EXPORT_PATTERNS = (
+    "*_full.json",
+    "*_full.jsonl",
+    *(f"*_full.json{suffix}" for suffix in COMPRESSIONS),
+    *(f"*_full.jsonl{suffix}" for suffix in COMPRESSIONS),
+    "*.lbarch",
+)
+
+SUMMARY_COLUMNS = ("user", "listens", "duplicates", "score", "risk", "mbid_coverage", "seconds")
+
+
+def export_stem(path):
+    """path without compression suffix and extension: USER_full.json.gz -> USER_full."""
+    return os.path.splitext(strip_compression(path))[0]
+
+
+def find_exports(paths):
+    """
+    Export files named by files, directories and glob patterns, in order.
+
+    Each export is returned once: of several files with the same stem
+    (USER_full.json, USER_full.jsonl.zst, USER_full.lbarch) the archive
+    is kept, or else the first one found.
+    """
+    found = {}
+    for path in paths:
+        if os.path.isdir(path):
+            matches = sorted({
+                match
+                for pattern in EXPORT_PATTERNS
+                for match in glob.glob(os.path.join(path, pattern))
+            })
+        elif os.path.exists(path):
+            matches = [path]
+        else:
+            matches = sorted(glob.glob(path))
+        for match in matches:
+            stem = export_stem(match)
+            if stem not in found or (is_archive(match) and not is_archive(found[stem])):
+                found[stem] = match
+    return list(found.values())
+
+
+# --------------------------------------------------
+# Worker
+# --------------------------------------------------
+
+def audit_account(job):
+    """Audit one export in a worker process; returns (path, result, seconds, error)."""
+    path, analyzer, near_window, timezone = job
+    start = time.perf_counter()
+
+    try:
+        if analyzer == "audit":
+            data = listenbrainz_audit_analyzer.load_export(path)
+            result = listenbrainz_audit_analyzer.analyze(data, near_window)
+        else:
+            data = listenbrainz_audit_v2.load_export(path)
+            state = listenbrainz_audit_v2.new_state(timezone)
+            result = listenbrainz_audit_v2.analyze(data, near_window, state)
+    except Exception as e:
+        return path, None, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+    return path, result, time.perf_counter() - start, None
+
+
+def summary_row(path, result, seconds):
+    summary = result["summary"]
+    coverage = summary.get("mbid_coverage")
+    return {
+        "user": user_from_path(path),
+        "listens": summary["total_listens"],
+        "duplicates": summary["exact_duplicates"],
+        "score": summary.get("integrity_score"),
+        "risk": result.get("integrity", {}).get("risk_level"),
+        "mbid_coverage": None if coverage is None else round(coverage, 4),
+        "seconds": round(seconds, 2),
+    }
+
+
+def format_row(row):
+    score = "" if row["score"] is None else row["score"]
+    risk = row["risk"] or ""
+    coverage = "" if row["mbid_coverage"] is None else f"{row['mbid_coverage'] * 100:.1f}"
+    return (
+        f"{row['user'][:24]:24} {row['listens']:>10} {row['duplicates']:>8} "
+        f"{score:>6} {risk:>9} {coverage:>7} {row['seconds']:>8.2f}"
+    )
+
+
+HEADER = (
+    f"{'User':24} {'Listens':>10} {'Dupes':>8} {'Score':>6} {'Risk':>9} {'MBID %':>7} {'Seconds':>8}"
+)
+
+
+def pool_context():
+    # Forked workers inherit the imported analyzers instead of re-importing them
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+# --------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit many ListenBrainz exports in parallel")
+    parser.add_argument("paths", nargs="+", help="Export files, directories or glob patterns")
+    parser.add_argument("--analyzer", choices=("audit", "audit_v2"), default="audit_v2", help="Analyzer to run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: CPU count)")
+    parser.add_argument("--near-window", type=int, help="Near duplicate window (seconds)")
+    parser.add_argument("--timezone", default="UTC", help="Timezone for audit_v2 calendar buckets")
+    parser.add_argument("--output-dir", help="Write each account's result to DIR/USER_audit.json")
+    parser.add_argument("--trend-db", help="Record each account in a SQLite trend store")
+    parser.add_argument("--csv", help="Write the combined summary table as CSV")
+    args = parser.parse_args()
+
+    exports = find_exports(args.paths)
+    if not exports:
+        print("No exports found.")
+        sys.exit(1)
+
+    workers = max(1, min(args.workers, len(exports)))
+    print(f"Auditing {len(exports)} exports with {workers} workers ({args.analyzer})\n")
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    jobs = [(path, args.analyzer, args.near_window, args.timezone) for path in exports]
+    rows = []
+    failed = []
+    start = time.perf_counter()
+
+    print(HEADER)
+
+    # One account per worker process: its memory is returned when it exits
+    with pool_context().Pool(workers, maxtasksperchild=1) as pool:
+        for path, result, seconds, error in pool.imap_unordered(audit_account, jobs):
+            if error:
+                failed.append((path, error))
+                print(f"{user_from_path(path)[:24]:24} FAILED: {error}")
+                continue
+
+            row = summary_row(path, result, seconds)
+            rows.append(row)
+            print(format_row(row))
+
+            if args.output_dir:
+                write_json(os.path.join(args.output_dir, f"{row['user']}_audit.json"), result, indent=2)
+            if args.trend_db:
+                record_trend(args.trend_db, row["user"], result, source=path)
+
+    elapsed = time.perf_counter() - start
+
+    rows.sort(key=lambda r: (r["score"] is None, r["score"] or 0, r["user"]))
+
+    print("\n===== BATCH AUDIT SUMMARY =====")
+    print(HEADER)
+    for row in rows:
+        print(format_row(row))
+    print("-" * len(HEADER))
+    print(f"Accounts:      {len(rows)}")
+    print(f"Failed:        {len(failed)}")
+    print(f"Total listens: {sum(r['listens'] for r in rows)}")
+    print(f"Wall time:     {elapsed:.2f}s")
+    print("===============================")
+
+    for path, error in failed:
+        print(f"Failed: {path}: {error}")
+
+    if args.csv:
+        temp_path = args.csv + ".tmp"
+        with open(temp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(temp_path, args.csv)
+        print("Created:", args.csv)
+
+    if args.output_dir:
+        print("Reports in:", args.output_dir)
+    if args.trend_db:
+        print("Recorded runs in:", args.trend_db)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
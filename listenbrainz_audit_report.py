@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+"""
+ListenBrainz Audit Report Output
+
+Machine-readable output for the audit analyzers.
+
+Both listenbrainz_audit_analyzer.py and listenbrainz_audit_v2.py build
+a structured result dict in analyze(). This module writes that result
+as JSON or CSV and can append each run to a local SQLite trend store,
+indexed by user and run time, so dashboards can follow integrity score,
+duplicate counts and MBID coverage without re-auditing old exports.
+
+Options (added to both analyzers):
+    --json report.json        # full result as JSON (report.json.gz / .zst compressed)
+    --csv report.csv          # flattened metric,value rows
+    --trend-db audit.db       # append this run to the trend store
+    --user USER               # trend store user (default: from export file name)
+
+Querying the trend store:
+    python listenbrainz_audit_report.py audit.db --user USER
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+from datetime import datetime, UTC
+
+from compressed_io import strip_compression, write_json
+
+
+# --------------------------------------------------
+# Emitters
+# --------------------------------------------------
+
+def flatten(result, prefix=""):
+    """Flatten a nested result into (dotted.metric, value) rows."""
+    rows = []
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            rows.extend(flatten(value, name + "."))
+        elif isinstance(value, list):
+            for i, item in enumerate(value):
+                if isinstance(item, dict):
+                    rows.extend(flatten(item, f"{name}.{i}."))
+                elif isinstance(item, (list, tuple)) and len(item) == 2:
+                    rows.append((f"{name}.{item[0]}", item[1]))
+                else:
+                    rows.append((f"{name}.{i}", item))
+        else:
+            rows.append((name, value))
+    return rows
+
+
+def write_csv(path, result):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["metric", "value"])
+        for metric, value in flatten(result):
+            writer.writerow([metric, "" if value is None else value])
+    os.replace(temp_path, path)
+
+
+# --------------------------------------------------
+# SQLite Trend Store
+# --------------------------------------------------
+
+TREND_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    run_at INTEGER NOT NULL,
+    analyzer TEXT NOT NULL,
+    source TEXT,
+    total_listens INTEGER,
+    exact_duplicates INTEGER,
+    integrity_score INTEGER,
+    mbid_coverage REAL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audit_runs_user_run_at ON audit_runs (user, run_at);
+"""
+
+
+def user_from_path(path):
+    """Guess the ListenBrainz user from an export name like USER_full.json(.gz)."""
+    # Usernames may contain dots, so only the file extensions are removed
+    name = os.path.splitext(strip_compression(os.path.basename(path)))[0]
+    for suffix in ("_export_full", "_full"):
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def open_trend_store(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(TREND_SCHEMA)
+    return conn
+
+
+def record_trend(db_path, user, result, source=None, run_at=None):
+    """Append one audit run to the trend store."""
+    if run_at is None:
+        run_at = int(datetime.now(UTC).timestamp())
+
+    summary = result.get("summary", {})
+
+    conn = open_trend_store(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO audit_runs (user, run_at, analyzer, source, total_listens, "
+            "exact_duplicates, integrity_score, mbid_coverage, result) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                user,
+                run_at,
+                result.get("analyzer"),
+                source,
+                summary.get("total_listens"),
+                summary.get("exact_duplicates"),
+                summary.get("integrity_score"),
+                summary.get("mbid_coverage"),
+                json.dumps(result),
+            ),
+        )
+    conn.close()
+
+
+def load_trend(db_path, user, analyzer=None, since=None):
+    """Return the recorded runs for a user, oldest first."""
+    query = (
+        "SELECT run_at, analyzer, total_listens, exact_duplicates, "
+        "integrity_score, mbid_coverage FROM audit_runs WHERE user = ?"
+    )
+    params = [user]
+
+    if analyzer:
+        query += " AND analyzer = ?"
+        params.append(analyzer)
+    if since is not None:
+        query += " AND run_at >= ?"
+        params.append(since)
+
+    query += " ORDER BY run_at"
+
+    conn = open_trend_store(db_path)
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+    return rows
+
+
+# --------------------------------------------------
+# CLI Helpers
+# --------------------------------------------------
+
+def add_output_arguments(parser):
+    parser.add_argument("--json", help="Write the audit result as JSON")
+    parser.add_argument("--csv", help="Write the audit result as metric,value CSV")
+    parser.add_argument("--trend-db", help="Append this run to a SQLite trend store")
+    parser.add_argument("--user", help="User recorded in the trend store (default: from export file name)")
+
+
+def emit_outputs(args, result):
+    if args.json:
+        write_json(args.json, result, indent=2)
+        print("Created:", args.json)
+
+    if args.csv:
+        write_csv(args.csv, result)
+        print("Created:", args.csv)
+
+    if args.trend_db:
+        user = args.user or user_from_path(args.file)
+        record_trend(args.trend_db, user, result, source=args.file)
+        print(f"Recorded run for {user} in: {args.trend_db}")
+
+
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show ListenBrainz audit trend history")
+    parser.add_argument("db", help="Path to SQLite trend store")
+    parser.add_argument("--user", required=True, help="ListenBrainz username")
+    parser.add_argument("--analyzer", help="Only show runs from this analyzer (audit, audit_v2)")
+    args = parser.parse_args()
+
+    print(f"{'Run at (UTC)':20} {'Analyzer':10} {'Listens':>10} {'Dupes':>8} {'Score':>6} {'MBID %':>7}")
+    for run_at, analyzer, total, dupes, score, coverage in load_trend(args.db, args.user, args.analyzer):
+        when = datetime.fromtimestamp(run_at, UTC).strftime("%Y-%m-%d %H:%M:%S")
+        score = "" if score is None else score
+        coverage = "" if coverage is None else f"{coverage * 100:.1f}"
+        print(f"{when:20} {analyzer:10} {total:>10} {dupes:>8} {score:>6} {coverage:>7}")
@@ -18,9 +18,15 @@ TEMPORAL ANALYSIS
 - Same-track rapid repeats
 - Minimum/median gap
 
+BATCH IMPORT SIGNATURES
+- Runs of identical timestamps
+- Runs of listens spaced exactly N seconds apart
+- Runs submitted by a known importer client
+
 METADATA HEALTH
 - Recording MBID coverage
 - Duration metadata coverage
+- Skip counts per threshold (--skip-thresholds) and duration distribution
 - Submission client breakdown
 
 DIVERSITY ANALYSIS
@@ -28,17 +34,42 @@ DIVERSITY ANALYSIS
 - Shannon entropy
 - Yearly distribution
 - Entropy by year
+- Monthly entropy and hour-of-day heatmap (--calendar)
 
 Usage:
     python listenbrainz_audit_v2.py export.json --near-window 60
+    python listenbrainz_audit_v2.py export.lbarch   # binary archive, see listenbrainz_archive.py
+    python listenbrainz_audit_v2.py export.json --skip-thresholds 20 40 45
+
+Incremental:
+    python listenbrainz_audit_v2.py export.json --state audit_state.json
+    Saves the accumulators after the run; later runs only ingest listens
+    newer than the saved watermark, plus any listens in the watermark
+    second itself that were not counted yet. The state keeps a duration
+    histogram, so skip counts for new --skip-thresholds need no re-scan.
+
+Machine-readable output:
+    --json report.json --csv report.csv --trend-db audit_trends.db
+
+Profiling:
+    --profile [--cprofile PHASE]
 """
 
 import json
 import argparse
+from bisect import bisect_left, bisect_right
 from collections import Counter, defaultdict
-from datetime import datetime, UTC
-import statistics
 import math
+import os
+from datetime import datetime, UTC
+
+from listenbrainz_audit_report import add_output_arguments, emit_outputs
+from batch_signatures import finish_scan, new_scan, scan_signatures
+from calendar_buckets import DOW_NAMES, CalendarBucketer, bucket_stats
+from compressed_io import load_json
+from duration_index import SKIP_THRESHOLDS, DurationIndex
+from listenbrainz_archive import ListenColumns, is_archive, open_archive
+from phase_profiler import NO_PROFILE, add_profile_arguments, profiler_from_args
 
 
 # --------------------------------------------------
@@ -46,8 +77,9 @@ import math
 # --------------------------------------------------
 
 def load_export(path):
-    with open(path) as f:
-        return json.load(f)
+    if is_archive(path):
+        return open_archive(path)
+    return load_json(path)
 
 
 def normalize_track(listen):
@@ -63,10 +95,6 @@ def normalize_full_key(listen):
     return artist, track, ts
 
 
-def get_year(ts):
-    return datetime.fromtimestamp(ts, UTC).year
-
-
 def shannon_entropy(counter):
     total = sum(counter.values())
     entropy = 0
@@ -76,126 +104,469 @@ def shannon_entropy(counter):
     return entropy
 
 
+# --------------------------------------------------
+# Incremental State
+# --------------------------------------------------
+
+STATE_VERSION = 5
+MAX_PRINTED_SPANS = 20
+
+# Durations are kept as a histogram of whole seconds (rounded up), exact
+# for any whole-second skip threshold
+DURATION_RESOLUTION_MS = 1000
+
+
+def new_state(timezone="UTC"):
+    """
+    Empty accumulator state.
+
+    Everything the report needs is kept here so that a later run can
+    ingest only listens newer than the watermark and still print the
+    same figures as a full re-audit.
+    """
+    return {
+        "version": STATE_VERSION,
+        "timezone": timezone,
+        "watermark": None,
+        # ListenColumns.listen_key of every listen counted at the watermark second
+        "watermark_keys": [],
+        "total": 0,
+        "exact_dupes": 0,
+        "prev_track": None,
+        "last_ts_by_track": {},
+        "collision_groups": {},
+        "gap_histogram": Counter(),
+        "same_track_gaps": Counter(),
+        "batch_scan": new_scan(),
+        "mbid_count": 0,
+        "duration_count": 0,
+        "duration_histogram": Counter(),
+        "client_counter": Counter(),
+        "artist_counter": Counter(),
+        "year_counter": Counter(),
+        "entropy_by_year": defaultdict(Counter),
+        "month_counter": Counter(),
+        "entropy_by_month": defaultdict(Counter),
+        "hour_heatmap": Counter(),
+    }
+
+
+def update_state(state, data, profiler=NO_PROFILE):
+    """
+    Fold listens not yet counted into the accumulators.
+
+    data is either a list of export listens or ListenColumns (for
+    example a mapped binary archive). Listens newer than the state's
+    watermark are ingested, and so are listens in the watermark second
+    itself that the earlier run did not see (matched by listen_key), so
+    a listen arriving late in an already audited second still counts.
+    Returns the number of listens ingested.
+    """
+    watermark = state["watermark"]
+
+    with profiler.phase("sort") as phase:
+        if isinstance(data, ListenColumns):
+            columns = data
+        else:
+            # Only listens from the watermark second onwards are sorted and interned
+            if watermark is not None:
+                data = [l for l in data if l["listened_at"] >= watermark]
+            columns = ListenColumns.from_listens(data)
+        batches = [columns]
+        if watermark is not None:
+            start = bisect_left(columns.timestamps, watermark)
+            end = bisect_right(columns.timestamps, watermark)
+            seen = Counter(state["watermark_keys"])
+            late = []
+            for i in range(start, end):
+                key = columns.listen_key(i)
+                if seen[key]:
+                    seen[key] -= 1
+                else:
+                    late.append(i)
+            batches = [columns.select(late), columns.tail(end)]
+        phase.items = sum(map(len, batches))
+
+    return sum(_ingest(state, batch, profiler) for batch in batches if len(batch))
+
+
+def _ingest(state, columns, profiler):
+    """
+    Fold listens no older than the watermark into the accumulators.
+
+    Listens are visited in timestamp order, so exact duplicates, gaps,
+    collisions and same-track repeats only ever need the previous listen
+    and the last timestamp seen for each normalized track.
+    """
+    watermark = state["watermark"]
+    timestamps = columns.timestamps
+    track_keys = columns.track_keys
+
+    # Structural
+    with profiler.phase("dedup") as phase:
+        last_ts_by_track = state["last_ts_by_track"]
+        tracks = [track_keys[track_id] for track_id in columns.track_ids]
+
+        for ts, track in zip(timestamps, tracks):
+            if last_ts_by_track.get(track) == ts:
+                state["exact_dupes"] += 1
+            last_ts_by_track[track] = ts
+
+        phase.items = len(columns)
+
+    # Temporal
+    with profiler.phase("temporal") as phase:
+        collision_groups = state["collision_groups"]
+        gap_histogram = state["gap_histogram"]
+        same_track_gaps = state["same_track_gaps"]
+
+        prev_ts = watermark
+        prev_track = state["prev_track"]
+
+        for ts, track in zip(timestamps, tracks):
+            if prev_ts is not None:
+                delta = ts - prev_ts
+                gap_histogram[delta] += 1
+                if delta == 0:
+                    collision_groups[ts] = collision_groups.get(ts, 1) + 1
+                if track == prev_track:
+                    same_track_gaps[delta] += 1
+
+            prev_ts = ts
+            prev_track = track
+
+        phase.items = len(columns)
+
+    # Batch import signatures
+    with profiler.phase("signatures") as phase:
+        scan_signatures(state["batch_scan"], timestamps, columns.client_ids, columns.client_names)
+        phase.items = len(columns)
+
+    # Metadata
+    with profiler.phase("metadata") as phase:
+        state["mbid_count"] += sum(columns.mbid_flags)
+        duration_counts = Counter(columns.durations)
+        del duration_counts[0]
+        state["duration_count"] += sum(duration_counts.values())
+        state["duration_histogram"].update(DurationIndex.bin_counts(duration_counts, DURATION_RESOLUTION_MS))
+
+        client_counter = state["client_counter"]
+        for client_id, count in Counter(columns.client_ids).items():
+            client_counter[columns.client_names[client_id] or "None"] += count
+
+        phase.items = len(columns)
+
+    # Diversity
+    with profiler.phase("diversity") as phase:
+        artist_names = columns.artist_names
+
+        artist_counter = state["artist_counter"]
+        for artist_id, count in Counter(columns.artist_ids).items():
+            if artist_names[artist_id]:
+                artist_counter[artist_names[artist_id]] += count
+
+        # Calendar buckets over the sorted timestamps
+        dated = bisect_right(timestamps, 0) if len(timestamps) and not timestamps[0] else 0
+
+        if dated < len(timestamps):
+            bucketer = CalendarBucketer(state["timezone"], timestamps[dated], timestamps[-1])
+            counts, bucket_artists, heatmap = bucket_stats(
+                bucketer, timestamps[dated:], columns.artist_ids[dated:], ("year", "month"), heatmap=True
+            )
+
+            state["year_counter"].update(counts["year"])
+            state["month_counter"].update(counts["month"])
+            state["hour_heatmap"].update(heatmap)
+            for kind, by_bucket in (("year", state["entropy_by_year"]), ("month", state["entropy_by_month"])):
+                for bucket, counter in bucket_artists[kind].items():
+                    for artist_id, count in counter.items():
+                        if artist_names[artist_id]:
+                            by_bucket[bucket][artist_names[artist_id]] += count
+
+        phase.items = len(columns)
+
+    # Remember what was counted in the last second, for the next run
+    keys = [columns.listen_key(i) for i in range(bisect_left(timestamps, prev_ts), len(columns))]
+    if prev_ts == watermark:
+        state["watermark_keys"].extend(keys)
+    else:
+        state["watermark_keys"] = keys
+
+    state["total"] += len(columns)
+    state["watermark"] = prev_ts
+    state["prev_track"] = prev_track
+
+    return len(columns)
+
+
+def load_state(path):
+    with open(path) as f:
+        raw = json.load(f)
+
+    if raw.get("version") != STATE_VERSION:
+        raise ValueError(f"Unsupported audit state version: {raw.get('version')}")
+
+    state = new_state()
+    state["watermark"] = raw["watermark"]
+    state["watermark_keys"] = [tuple(key) for key in raw["watermark_keys"]]
+    state["total"] = raw["total"]
+    state["exact_dupes"] = raw["exact_dupes"]
+    state["prev_track"] = tuple(raw["prev_track"]) if raw["prev_track"] else None
+    state["last_ts_by_track"] = {
+        (artist, track): ts for artist, track, ts in raw["last_ts_by_track"]
+    }
+    state["collision_groups"] = {int(ts): c for ts, c in raw["collision_groups"].items()}
+    state["gap_histogram"] = Counter({int(g): c for g, c in raw["gap_histogram"].items()})
+    state["same_track_gaps"] = Counter({int(g): c for g, c in raw["same_track_gaps"].items()})
+    state["batch_scan"] = raw["batch_scan"]
+    state["mbid_count"] = raw["mbid_count"]
+    state["duration_count"] = raw["duration_count"]
+    state["duration_histogram"] = Counter({int(s): c for s, c in raw["duration_histogram"].items()})
+    state["client_counter"] = Counter(raw["client_counter"])
+    state["artist_counter"] = Counter(raw["artist_counter"])
+    state["year_counter"] = Counter({int(y): c for y, c in raw["year_counter"].items()})
+    for year, artists in raw["entropy_by_year"].items():
+        state["entropy_by_year"][int(year)] = Counter(artists)
+    state["month_counter"] = Counter(raw["month_counter"])
+    for month, artists in raw["entropy_by_month"].items():
+        state["entropy_by_month"][month] = Counter(artists)
+    state["hour_heatmap"] = Counter({(dow, hour): c for dow, hour, c in raw["hour_heatmap"]})
+    state["timezone"] = raw["timezone"]
+
+    return state
+
+
+def save_state(path, state):
+    raw = dict(state)
+    raw["last_ts_by_track"] = [
+        [artist, track, ts] for (artist, track), ts in state["last_ts_by_track"].items()
+    ]
+    raw["hour_heatmap"] = [[dow, hour, c] for (dow, hour), c in state["hour_heatmap"].items()]
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(raw, f)
+    os.replace(temp_path, path)
+
+
+def count_within(histogram, window):
+    return sum(c for gap, c in histogram.items() if gap <= window)
+
+
+def histogram_median(histogram):
+    """Median of the values described by a {value: count} histogram."""
+    n = sum(histogram.values())
+    if not n:
+        return None
+
+    lo, hi = (n - 1) // 2, n // 2
+    seen = 0
+    low_value = None
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if low_value is None and seen > lo:
+            low_value = value
+        if seen > hi:
+            return (low_value + value) / 2
+
+
 # --------------------------------------------------
 # Main Analysis
 # --------------------------------------------------
 
-def analyze(data, near_window=None):
+def analyze(data, near_window=None, state=None, profiler=NO_PROFILE, skip_thresholds=SKIP_THRESHOLDS):
+    """Ingest listens into the state and return the structured audit result."""
 
-    print("\n==============================")
-    print("LISTENBRAINZ FORENSIC AUDIT v2")
-    print("==============================\n")
+    if state is None:
+        state = new_state()
+    update_state(state, data, profiler)
+    with profiler.phase("report") as phase:
+        result = build_result(state, near_window, skip_thresholds)
+        phase.items = state["total"]
+    return result
 
-    total = len(data)
-    print("==== STRUCTURAL INTEGRITY ====")
-    print("Total listens:", total)
 
-    # Exact duplicates
-    seen = set()
-    exact_dupes = 0
-    for l in data:
-        key = normalize_full_key(l)
-        if key in seen:
-            exact_dupes += 1
-        else:
-            seen.add(key)
+def build_result(state, near_window=None, skip_thresholds=SKIP_THRESHOLDS):
 
-    print("Exact duplicates:", exact_dupes)
+    total = state["total"]
+    exact_dupes = state["exact_dupes"]
+    collision_groups = state["collision_groups"]
+    same_track_gaps = state["same_track_gaps"]
+    gaps = state["gap_histogram"]
 
-    # Timestamp collisions
-    ts_counter = Counter(l["listened_at"] for l in data)
-    collision_groups = {ts: c for ts, c in ts_counter.items() if c > 1}
+    rapid_5 = count_within(gaps, 5)
 
-    print("Timestamp collision groups:", len(collision_groups))
-    if collision_groups:
-        print("Largest collision:", max(collision_groups.values()))
+    artist_counter = state["artist_counter"]
+    year_counter = state["year_counter"]
+    entropy_by_year = state["entropy_by_year"]
+    month_counter = state["month_counter"]
+    entropy_by_month = state["entropy_by_month"]
+    heatmap = state["hour_heatmap"]
+    spans = finish_scan(state["batch_scan"])
+    span_kinds = Counter(span["kind"] for span in spans)
+    durations = DurationIndex.from_histogram(state["duration_histogram"], DURATION_RESOLUTION_MS)
 
-    # Near duplicates
-    near_dupes = 0
-    if near_window:
-        sorted_data = sorted(data, key=lambda x: x["listened_at"])
-        for i in range(1, len(sorted_data)):
-            curr = sorted_data[i]
-            prev = sorted_data[i - 1]
-            if abs(curr["listened_at"] - prev["listened_at"]) <= near_window:
-                if normalize_track(curr) == normalize_track(prev):
-                    near_dupes += 1
-        print(f"Near duplicates (±{near_window}s):", near_dupes)
+    # Integrity Score (simple heuristic)
+    score = 100
 
-    print()
+    if exact_dupes > 0:
+        score -= min(20, exact_dupes // 50)
 
-    # --------------------------------------------------
-    print("==== TEMPORAL ANALYSIS ====")
+    if rapid_5 > total * 0.05:
+        score -= 10
 
-    timestamps = sorted(l["listened_at"] for l in data)
+    if len(collision_groups) > 10:
+        score -= 10
+
+    if score >= 90:
+        risk = "LOW"
+    elif score >= 75:
+        risk = "MODERATE"
+    else:
+        risk = "HIGH"
+
+    return {
+        "analyzer": "audit_v2",
+        "summary": {
+            "total_listens": total,
+            "exact_duplicates": exact_dupes,
+            "integrity_score": score,
+            "mbid_coverage": state["mbid_count"] / total if total else None,
+        },
+        "structural": {
+            "total_listens": total,
+            "exact_duplicates": exact_dupes,
+            "timestamp_collision_groups": len(collision_groups),
+            "largest_collision": max(collision_groups.values()) if collision_groups else None,
+            "near_window": near_window,
+            "near_duplicates": count_within(same_track_gaps, near_window) if near_window else None,
+        },
+        "temporal": {
+            "rapid_5s": rapid_5,
+            "rapid_10s": count_within(gaps, 10),
+            "min_gap": min(gaps) if gaps else None,
+            "median_gap": int(histogram_median(gaps)) if gaps else None,
+            "same_track_15s": count_within(same_track_gaps, 15),
+            "same_track_60s": count_within(same_track_gaps, 60),
+        },
+        "batch_signatures": {
+            "collision_spans": span_kinds["collision"],
+            "progression_spans": span_kinds["progression"],
+            "importer_spans": span_kinds["importer"],
+            "spans": spans,
+        },
+        "metadata": {
+            "mbid_count": state["mbid_count"],
+            "duration_count": state["duration_count"],
+            "skip_counts": durations.thresholds(skip_thresholds),
+            "duration_distribution": durations.distribution(),
+            "submission_clients": dict(state["client_counter"].most_common()),
+        },
+        "diversity": {
+            "unique_artists": len(artist_counter),
+            "global_entropy": round(shannon_entropy(artist_counter), 4),
+            "yearly_distribution": {year: year_counter[year] for year in sorted(year_counter)},
+            "entropy_by_year": {
+                year: round(shannon_entropy(entropy_by_year[year]), 3)
+                for year in sorted(entropy_by_year)
+            },
+            "monthly_distribution": {month: month_counter[month] for month in sorted(month_counter)},
+            "entropy_by_month": {
+                month: round(shannon_entropy(entropy_by_month[month]), 3)
+                for month in sorted(entropy_by_month)
+            },
+        },
+        "calendar": {
+            "timezone": state["timezone"],
+            "hour_heatmap": {
+                name: [heatmap[dow, hour] for hour in range(24)]
+                for dow, name in enumerate(DOW_NAMES)
+            },
+        },
+        "integrity": {
+            "score": score,
+            "risk_level": risk,
+        },
+    }
+
+
+def print_report(result, calendar=False):
 
-    gaps = []
-    rapid_5 = 0
-    rapid_10 = 0
+    print("\n==============================")
+    print("LISTENBRAINZ FORENSIC AUDIT v2")
+    print("==============================\n")
 
-    for i in range(1, len(timestamps)):
-        delta = timestamps[i] - timestamps[i - 1]
-        gaps.append(delta)
-        if delta <= 5:
-            rapid_5 += 1
-        if delta <= 10:
-            rapid_10 += 1
+    structural = result["structural"]
+    total = structural["total_listens"]
+    print("==== STRUCTURAL INTEGRITY ====")
+    print("Total listens:", total)
+    print("Exact duplicates:", structural["exact_duplicates"])
 
-    print("Rapid ≤5s:", rapid_5)
-    print("Rapid ≤10s:", rapid_10)
+    print("Timestamp collision groups:", structural["timestamp_collision_groups"])
+    if structural["largest_collision"] is not None:
+        print("Largest collision:", structural["largest_collision"])
 
-    if gaps:
-        print("Minimum gap:", min(gaps))
-        print("Median gap:", int(statistics.median(gaps)))
+    near_window = structural["near_window"]
+    if near_window:
+        print(f"Near duplicates (±{near_window}s):", structural["near_duplicates"])
 
-    # Same-track rapid repeats
-    same_track_15 = 0
-    same_track_60 = 0
+    print()
 
-    sorted_data = sorted(data, key=lambda x: x["listened_at"])
+    # --------------------------------------------------
+    print("==== TEMPORAL ANALYSIS ====")
 
-    for i in range(1, len(sorted_data)):
-        curr = sorted_data[i]
-        prev = sorted_data[i - 1]
-        delta = curr["listened_at"] - prev["listened_at"]
+    temporal = result["temporal"]
+    print("Rapid ≤5s:", temporal["rapid_5s"])
+    print("Rapid ≤10s:", temporal["rapid_10s"])
 
-        if normalize_track(curr) == normalize_track(prev):
-            if delta <= 15:
-                same_track_15 += 1
-            if delta <= 60:
-                same_track_60 += 1
+    if temporal["min_gap"] is not None:
+        print("Minimum gap:", temporal["min_gap"])
+        print("Median gap:", temporal["median_gap"])
 
-    print("Same track ≤15s:", same_track_15)
-    print("Same track ≤60s:", same_track_60)
+    print("Same track ≤15s:", temporal["same_track_15s"])
+    print("Same track ≤60s:", temporal["same_track_60s"])
     print()
 
     # --------------------------------------------------
-    print("==== METADATA HEALTH ====")
+    print("==== BATCH IMPORT SIGNATURES ====")
+
+    signatures = result["batch_signatures"]
+    print("Identical-timestamp runs:", signatures["collision_spans"])
+    print("Equal-gap runs:", signatures["progression_spans"])
+    print("Importer client runs:", signatures["importer_spans"])
+
+    if signatures["spans"]:
+        print("\nLargest spans (UTC):")
+        for span in signatures["spans"][:MAX_PRINTED_SPANS]:
+            start = datetime.fromtimestamp(span["start"], UTC).strftime("%Y-%m-%d %H:%M:%S")
+            end = datetime.fromtimestamp(span["end"], UTC).strftime("%Y-%m-%d %H:%M:%S")
+            step = f"every {span['step']}s" if span["step"] else ""
+            print(
+                f"{span['kind']:<12} {span['size']:>7} listens  {start} -> {end}  {step:<12}"
+                f"{span['dominant_client']} ({span['dominant_share']:.0%})"
+            )
+        if len(signatures["spans"]) > MAX_PRINTED_SPANS:
+            print(f"... {len(signatures['spans']) - MAX_PRINTED_SPANS} more (see --json)")
 
-    mbid_count = 0
-    duration_count = 0
-    client_counter = Counter()
+    print()
 
-    for l in data:
-        meta = l.get("track_metadata", {})
-        add = meta.get("additional_info", {})
+    # --------------------------------------------------
+    print("==== METADATA HEALTH ====")
 
-        if add.get("recording_mbid"):
-            mbid_count += 1
+    metadata = result["metadata"]
+    print("Recording MBID coverage:", f"{metadata['mbid_count']}/{total}")
+    print("Duration metadata coverage:", f"{metadata['duration_count']}/{total}")
 
-        if add.get("duration_ms"):
-            duration_count += 1
+    if metadata["duration_distribution"]:
+        print("\nSkips (duration ≤ threshold):")
+        for t, count in metadata["skip_counts"].items():
+            print(f"≤{t}s: {count}")
 
-        client = add.get("submission_client")
-        if client:
-            client_counter[client] += 1
-        else:
-            client_counter["None"] += 1
+        print("\nDuration distribution:")
+        for bucket, count in metadata["duration_distribution"].items():
+            print(bucket, count)
 
-    print("Recording MBID coverage:", f"{mbid_count}/{total}")
-    print("Duration metadata coverage:", f"{duration_count}/{total}")
     print("\nSubmission Clients:")
-    for client, count in client_counter.most_common():
+    for client, count in metadata["submission_clients"].items():
         print(f"{client}: {count}")
 
     print()
@@ -203,61 +574,41 @@ def analyze(data, near_window=None):
     # --------------------------------------------------
     print("==== DIVERSITY ANALYSIS ====")
 
-    artist_counter = Counter()
-    year_counter = Counter()
-    entropy_by_year = defaultdict(Counter)
-
-    for l in data:
-        artist = l.get("track_metadata", {}).get("artist_name")
-        ts = l.get("listened_at")
-
-        if artist:
-            artist_counter[artist] += 1
-
-        if ts:
-            year = get_year(ts)
-            year_counter[year] += 1
-            if artist:
-                entropy_by_year[year][artist] += 1
-
-    print("Unique artists:", len(artist_counter))
-    print("Global entropy:", round(shannon_entropy(artist_counter), 4))
+    diversity = result["diversity"]
+    print("Unique artists:", diversity["unique_artists"])
+    print("Global entropy:", diversity["global_entropy"])
 
     print("\nYearly distribution:")
-    for year in sorted(year_counter):
-        print(year, year_counter[year])
+    for year, count in diversity["yearly_distribution"].items():
+        print(year, count)
 
     print("\nEntropy by year:")
-    for year in sorted(entropy_by_year):
-        ent = shannon_entropy(entropy_by_year[year])
-        print(year, round(ent, 3))
+    for year, ent in diversity["entropy_by_year"].items():
+        print(year, ent)
 
     print()
 
     # --------------------------------------------------
-    # Integrity Score (simple heuristic)
-    # --------------------------------------------------
+    if calendar:
+        print(f"==== CALENDAR ANALYSIS ({result['calendar']['timezone']}) ====")
 
-    score = 100
+        print("\nMonthly distribution / entropy:")
+        for month, count in diversity["monthly_distribution"].items():
+            print(month, count, diversity["entropy_by_month"].get(month, 0))
 
-    if exact_dupes > 0:
-        score -= min(20, exact_dupes // 50)
+        heatmap = result["calendar"]["hour_heatmap"]
+        width = max(3, max(len(str(c)) for row in heatmap.values() for c in row))
+        print("\nHour-of-day heatmap:")
+        print("    " + " ".join(f"{hour:>{width}}" for hour in range(24)))
+        for name, row in heatmap.items():
+            print(f"{name} " + " ".join(f"{c:>{width}}" for c in row))
 
-    if rapid_5 > total * 0.05:
-        score -= 10
-
-    if len(collision_groups) > 10:
-        score -= 10
+        print()
 
+    # --------------------------------------------------
     print("==== FINAL INTEGRITY SCORE ====")
-    print("Integrity Score:", score, "/ 100")
-
-    if score >= 90:
-        print("Risk Level: LOW")
-    elif score >= 75:
-        print("Risk Level: MODERATE")
-    else:
-        print("Risk Level: HIGH")
+    print("Integrity Score:", result["integrity"]["score"], "/ 100")
+    print("Risk Level:", result["integrity"]["risk_level"])
 
     print("\n===== AUDIT COMPLETE =====\n")
 
@@ -268,7 +619,41 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="ListenBrainz Forensic Audit v2")
     parser.add_argument("file", help="Path to export JSON")
     parser.add_argument("--near-window", type=int, help="Enable near duplicate window (seconds)")
+    parser.add_argument("--state", help="Incremental state file; only listens not counted in it yet are ingested")
+    parser.add_argument("--timezone", default="UTC", help="Timezone for calendar buckets, e.g. Europe/London")
+    parser.add_argument("--calendar", action="store_true", help="Print monthly entropy and the hour-of-day heatmap")
+    parser.add_argument(
+        "--skip-thresholds", type=int, nargs="+", default=SKIP_THRESHOLDS, metavar="SECONDS",
+        help="Skip count thresholds (default: 5 10 15 30 60 90)",
+    )
+    add_output_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    data = load_export(args.file)
-    analyze(data, args.near_window)
+    profiler = profiler_from_args(args)
+
+    state = new_state(args.timezone)
+    with profiler.phase("load") as phase:
+        if args.state and os.path.exists(args.state):
+            state = load_state(args.state)
+            print(f"Resuming audit state (watermark: {state['watermark']})")
+            if state["timezone"] != args.timezone:
+                parser.error(f"State was built with --timezone {state['timezone']}")
+
+        data = load_export(args.file)
+        phase.items = len(data)
+
+    result = analyze(data, args.near_window, state, profiler, args.skip_thresholds)
+    print_report(result, args.calendar)
+
+    if profiler.enabled:
+        result["profile"] = profiler.rows()
+
+    with profiler.phase("write"):
+        emit_outputs(args, result)
+
+        if args.state:
+            save_state(args.state, state)
+            print(f"Saved audit state: {args.state}")
+
+    profiler.report()
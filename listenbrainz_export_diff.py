@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+"""
+ListenBrainz Export Diff
+
+Compares two ListenBrainz exports (e.g. before and after a
+delete-and-reimport) and reports which listens were added, removed or
+had their metadata changed.
+
+How it works:
+
+- Each export is read as a stream and sorted by normalize_full_key
+  (artist, track, listened_at) in bounded chunks; chunks that do not fit
+  in memory are spilled to temporary run files and merged back.
+- The two sorted streams are walked side by side. Listens with the same
+  key are matched (identical metadata first); unmatched listens are
+  added or removed, matched listens with different metadata are changed.
+
+Metadata compared: the track_metadata of each listen, except the
+server-side mbid_mapping and the additional_info keys that change on
+every import (recording_msid, submission_client,
+submission_client_version). inserted_at, user_name and the top-level
+recording_msid are ignored as well.
+
+Usage:
+    python listenbrainz_export_diff.py before_full.json after_full.json
+
+Optional:
+    --output diff.jsonl      # one {"change": ..., ...} record per differing listen (.gz/.zst ok)
+    --chunk-size 200000      # listens sorted in memory at a time
+    --show 10                # print the first N changes of each kind
+"""
+
+import argparse
+import heapq
+import json
+import os
+import tempfile
+from itertools import groupby, islice
+
+from compressed_io import iter_json_records, open_text
+from listenbrainz_audit_v2 import normalize_full_key
+
+CHUNK_SIZE = 200_000
+CHANGE_KINDS = ("added", "removed", "changed")
+
+# additional_info keys set by the server or the importing client
+IMPORT_INFO_KEYS = ("recording_msid", "submission_client", "submission_client_version")
+
+
+# --------------------------------------------------
+# Sorted Streams
+# --------------------------------------------------
+
+def metadata_of(listen):
+    meta = dict(listen.get("track_metadata", {}))
+    meta.pop("mbid_mapping", None)
+    if "additional_info" in meta:
+        info = dict(meta["additional_info"])
+        for key in IMPORT_INFO_KEYS:
+            info.pop(key, None)
+        meta["additional_info"] = info
+    return meta
+
+
+def _write_run(directory, records):
+    records.sort(key=lambda r: r[0])
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".run")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for key, listen in records:
+            f.write(json.dumps([key, listen]))
+            f.write("\n")
+    return path
+
+
+def _read_run(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            key, listen = json.loads(line)
+            yield tuple(key), listen
+
+
+def sorted_listens(path, directory, chunk_size=CHUNK_SIZE):
+    """
+    Yield (key, listen) for every listen in an export, sorted by key.
+
+    At most chunk_size listens are held in memory; larger exports are
+    sorted in runs written to directory and merged.
+    """
+    keyed = ((normalize_full_key(l), l) for l in iter_json_records(path))
+
+    chunk = list(islice(keyed, chunk_size + 1))
+    if len(chunk) <= chunk_size:
+        # Everything fits in memory
+        chunk.sort(key=lambda r: r[0])
+        yield from chunk
+        return
+
+    runs = []
+    while chunk:
+        runs.append(_write_run(directory, chunk))
+        chunk = list(islice(keyed, chunk_size))
+
+    yield from heapq.merge(*(_read_run(run) for run in runs), key=lambda r: r[0])
+
+
+# --------------------------------------------------
+# Merge Comparison
+# --------------------------------------------------
+
+def _match_group(before, after):
+    """Yield changes between listens that share one key."""
+    after = list(after)
+    unmatched = []
+
+    # Identical metadata first, so duplicates pair up with their twin
+    for listen in before:
+        meta = metadata_of(listen)
+        for i, other in enumerate(after):
+            if metadata_of(other) == meta:
+                del after[i]
+                break
+        else:
+            unmatched.append(listen)
+
+    for listen, other in zip(unmatched, after):
+        yield {"change": "changed", "before": listen, "after": other}
+    for listen in unmatched[len(after):]:
+        yield {"change": "removed", "listen": listen}
+    for listen in after[len(unmatched):]:
+        yield {"change": "added", "listen": listen}
+
+
+def _groups(stream):
+    for key, group in groupby(stream, key=lambda r: r[0]):
+        yield key, [listen for _, listen in group]
+
+
+def diff_streams(before, after):
+    """
+    Yield changes between two key-sorted (key, listen) streams.
+
+    Each change is {"change": "added" | "removed", "listen": ...} or
+    {"change": "changed", "before": ..., "after": ...}.
+    """
+    before = _groups(before)
+    after = _groups(after)
+    a = next(before, None)
+    b = next(after, None)
+
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[0] < b[0]):
+            for listen in a[1]:
+                yield {"change": "removed", "listen": listen}
+            a = next(before, None)
+        elif a is None or b[0] < a[0]:
+            for listen in b[1]:
+                yield {"change": "added", "listen": listen}
+            b = next(after, None)
+        else:
+            yield from _match_group(a[1], b[1])
+            a = next(before, None)
+            b = next(after, None)
+
+
+def describe(listen):
+    meta = listen.get("track_metadata", {})
+    return f"{listen.get('listened_at')}  {meta.get('artist_name')} - {meta.get('track_name')}"
+
+
+# --------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two ListenBrainz exports")
+    parser.add_argument("before", help="Export before (JSON / JSON Lines, optionally .gz/.zst)")
+    parser.add_argument("after", help="Export after")
+    parser.add_argument("--output", help="Write every change as JSON Lines")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Listens sorted in memory at a time")
+    parser.add_argument("--show", type=int, default=10, help="Print the first N changes of each kind")
+    args = parser.parse_args()
+
+    counts = dict.fromkeys(CHANGE_KINDS, 0)
+    shown = {kind: [] for kind in CHANGE_KINDS}
+
+    with tempfile.TemporaryDirectory(prefix="lbdiff-") as directory:
+        before = sorted_listens(args.before, directory, args.chunk_size)
+        after = sorted_listens(args.after, directory, args.chunk_size)
+
+        out = open_text(args.output, "w") if args.output else None
+        try:
+            for change in diff_streams(before, after):
+                kind = change["change"]
+                counts[kind] += 1
+                if len(shown[kind]) < args.show:
+                    shown[kind].append(change)
+                if out:
+                    out.write(json.dumps(change))
+                    out.write("\n")
+        finally:
+            if out:
+                out.close()
+
+    for kind in CHANGE_KINDS:
+        if not shown[kind]:
+            continue
+        print(f"\n{kind.capitalize()}:")
+        for change in shown[kind]:
+            if kind == "changed":
+                print(" ", describe(change["before"]))
+                print("   ->", describe(change["after"]))
+            else:
+                print(" ", describe(change["listen"]))
+        if counts[kind] > len(shown[kind]):
+            print(f"  ... {counts[kind] - len(shown[kind])} more")
+
+    print("\n===== EXPORT DIFF =====")
+    print(f"Added:    {counts['added']}")
+    print(f"Removed:  {counts['removed']}")
+    print(f"Changed:  {counts['changed']}")
+    print("=======================")
+    if args.output:
+        print("Created:", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,32 +6,48 @@ ListenBrainz Full Export Script
 Exports all listens for a given user using the ListenBrainz API.
 Supports automatic resume and safe incremental writes.
 
+Each fetched page is appended to a plain checkpoint file next to the
+output (OUTPUT.part.jsonl); the output itself, compressed and formatted
+by its extension, is written once when the export completes. A re-run
+resumes from the output and the checkpoint.
+
 Usage:
     python listenbrainz_export_full_listens.py --username USER --token TOKEN
 
 Optional:
-    --output filename.json
+    --output filename.json        # .json.gz, .jsonl, .jsonl.zst, ... are compressed/formatted by extension
+    --verify                      # compare an existing export with the server and fetch only missing listens
+    --verify-all                  # like --verify, but probe every window
+    --profile [--cprofile PHASE]   # per-phase timing (load, fetch, checkpoint, verify, write)
 """
 
 import requests
 import json
 import time
+from bisect import bisect_left
+from collections import Counter
 import os
 import argparse
 import sys
 
+from compressed_io import load_json, write_json
+from phase_profiler import add_profile_arguments, profiler_from_args
+
 API = "https://api.listenbrainz.org/1"
 BATCH_SIZE = 1000
+VERIFY_WINDOW = 900
 SLEEP_BETWEEN_REQUESTS = 0.5
 MAX_RETRIES = 5
 
 
-def fetch_batch(username, token, max_ts=None):
+def fetch_batch(username, token, max_ts=None, min_ts=None, count=BATCH_SIZE):
     headers = {"Authorization": f"Token {token}"}
-    params = {"count": BATCH_SIZE}
+    params = {"count": count}
 
     if max_ts:
         params["max_ts"] = max_ts
+    if min_ts:
+        params["min_ts"] = min_ts
 
     response = requests.get(
         f"{API}/user/{username}/listens",
@@ -43,53 +59,278 @@ def fetch_batch(username, token, max_ts=None):
     return response.json()
 
 
+def fetch_listen_count(username, token):
+    response = requests.get(
+        f"{API}/user/{username}/listen-count",
+        headers={"Authorization": f"Token {token}"},
+        timeout=30,
+    )
+    response.raise_for_status()
+    return response.json()["payload"]["count"]
+
+
+def with_retries(request, *args, **kwargs):
+    """Call request with exponential backoff; None once MAX_RETRIES attempts failed."""
+    for retries in range(1, MAX_RETRIES + 1):
+        try:
+            return request(*args, **kwargs)
+        except Exception as e:
+            wait = 2 ** retries
+            print(f"Error: {e}")
+            print(f"Retrying in {wait}s ({retries}/{MAX_RETRIES})...")
+            time.sleep(wait)
+    return None
+
+
 def safe_write_json(path, data):
-    temp_path = path + ".tmp"
-    with open(temp_path, "w") as f:
-        json.dump(data, f)
-    os.replace(temp_path, path)
+    # Atomic; gzip/zstd and JSON Lines by extension (e.g. USER_full.jsonl.zst)
+    write_json(path, data)
+
+
+def checkpoint_path(output_file):
+    return output_file + ".part.jsonl"
+
+
+def load_checkpoint(path):
+    """
+    Listens of every complete page in a checkpoint file.
+
+    A torn final page (from a crash mid-write) is cut off the file, so
+    the next page is appended on a line of its own; it is fetched again.
+    """
+    listens = []
+    valid = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                page = json.loads(line)
+            except ValueError:
+                break
+            listens.extend(page)
+            valid += len(line)
+
+    if valid < os.path.getsize(path):
+        os.truncate(path, valid)
+    return listens
+
+
+def append_checkpoint(path, listens):
+    # One page per line, so only the page being written can be lost
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(listens))
+        f.write("\n")
+
+
+def finish_output(output_file, all_listens):
+    """Write the complete output once and drop the checkpoint."""
+    safe_write_json(output_file, all_listens)
+    checkpoint = checkpoint_path(output_file)
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+
+# --------------------------------------------------
+# Verify
+# --------------------------------------------------
+
+def listen_key(listen):
+    meta = listen.get("track_metadata", {})
+    return (listen["listened_at"], meta.get("artist_name"), meta.get("track_name"))
+
+
+def probe_windows(timestamps, oldest_ts, latest_ts):
+    """
+    [start, end) time windows to probe, most suspicious first.
+
+    The local timeline is cut into windows of VERIFY_WINDOW listens, so
+    a complete window fits in one page with room to spare. Each is
+    scored by its longest stretch without a local listen; the span
+    before the oldest and after the newest local listen come first.
+    """
+    if not timestamps:
+        return [(oldest_ts, latest_ts + 1)]
+
+    cuts = []
+    for i in range(0, len(timestamps), VERIFY_WINDOW):
+        if not cuts or timestamps[i] != cuts[-1]:
+            cuts.append(timestamps[i])
+    cuts.append(timestamps[-1] + 1)
+
+    scored = []
+    for start, end in zip(cuts, cuts[1:]):
+        i = bisect_left(timestamps, start)
+        j = bisect_left(timestamps, end)
+        gaps = [b - a for a, b in zip(timestamps[i:j], timestamps[i + 1:j])]
+        scored.append((max(gaps, default=0), start, end))
+    scored.sort(key=lambda x: -x[0])
 
+    windows = []
+    if oldest_ts < timestamps[0]:
+        windows.append((oldest_ts, timestamps[0]))
+    if latest_ts > timestamps[-1]:
+        windows.append((timestamps[-1] + 1, latest_ts + 1))
+    windows.extend((start, end) for _, start, end in scored)
+    return windows
+
+
+def verify_window(username, token, start, end, timestamps, keys, stats):
+    """
+    Server listens missing locally in [start, end).
+
+    One page covers the window if the server has fewer than BATCH_SIZE
+    listens in it; a full page means listens are missing, and the window
+    is split in half until each part fits in a page. Local listens the
+    server does not have are counted in stats["extra"].
+    """
+    data = with_retries(fetch_batch, username, token, max_ts=end, min_ts=start - 1)
+    if data is None:
+        raise RuntimeError("Max retries exceeded")
+    stats["requests"] += 1
+    listens = data["payload"]["listens"]
+
+    if len(listens) >= BATCH_SIZE:
+        if end - start > 1:
+            mid = (start + end) // 2
+            return (
+                verify_window(username, token, start, mid, timestamps, keys, stats)
+                + verify_window(username, token, mid, end, timestamps, keys, stats)
+            )
+        print(f"Warning: more than {BATCH_SIZE} listens at {start}; only one page compared.")
+
+    i = bisect_left(timestamps, start)
+    j = bisect_left(timestamps, end)
+    local = Counter(keys[i:j])
+    server = Counter(listen_key(l) for l in listens)
+    stats["extra"] += sum((local - server).values())
+
+    unmatched = server - local
+    missing = []
+    for l in listens:
+        key = listen_key(l)
+        if unmatched[key] > 0:
+            unmatched[key] -= 1
+            missing.append(l)
+    return missing
+
+
+def verify_export(username, token, all_listens, verify_all=False):
+    """
+    Compare the local export with the server and return the listens it lacks.
+
+    The listen-count endpoint gives the number of listens missing; time
+    windows are then probed (most suspicious first) until that many have
+    been found, or every window has been checked with verify_all.
+    """
+    server_count = with_retries(fetch_listen_count, username, token)
+    if server_count is None:
+        raise RuntimeError("Max retries exceeded")
+    deficit = server_count - len(all_listens)
+
+    print(f"Server listens: {server_count}")
+    print(f"Local listens:  {len(all_listens)}")
+
+    if deficit <= 0 and not verify_all:
+        print("Local export has as many listens as the server.")
+        return []
+
+    bounds = with_retries(fetch_batch, username, token, count=1)
+    if bounds is None:
+        raise RuntimeError("Max retries exceeded")
+    payload = bounds["payload"]
+    newest = payload["listens"][0]["listened_at"] if payload["listens"] else 0
+    latest_ts = payload.get("latest_listen_ts") or newest
+    oldest_ts = payload.get("oldest_listen_ts") or 1
+
+    local = sorted((listen_key(l) for l in all_listens), key=lambda k: k[0])
+    timestamps = [key[0] for key in local]
+    stats = {"requests": 2, "extra": 0}
+    missing = []
+
+    for start, end in probe_windows(timestamps, oldest_ts, latest_ts):
+        if not verify_all and len(missing) - stats["extra"] >= deficit:
+            break
+        found = verify_window(username, token, start, end, timestamps, local, stats)
+        if found:
+            print(f"Missing {len(found)} listens in [{start}, {end})")
+        missing.extend(found)
+        time.sleep(SLEEP_BETWEEN_REQUESTS)
+
+    print(f"Requests:       {stats['requests']}")
+    print(f"Missing found:  {len(missing)}")
+    print(f"Local only:     {stats['extra']}")
+    return missing
+
+
+# --------------------------------------------------
 
 def main():
     parser = argparse.ArgumentParser(description="Export all ListenBrainz listens.")
     parser.add_argument("--username", required=True, help="ListenBrainz username")
     parser.add_argument("--token", required=True, help="ListenBrainz user token")
     parser.add_argument("--output", help="Output file name")
+    parser.add_argument("--verify", action="store_true", help="Check an existing export against the server and fetch only missing listens")
+    parser.add_argument("--verify-all", action="store_true", help="With --verify, probe every window instead of stopping once the count matches")
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
 
+    profiler = profiler_from_args(args)
+
     username = args.username
     token = args.token
     output_file = args.output or f"{username}_full.json"
 
+    checkpoint = checkpoint_path(output_file)
     all_listens = []
     max_ts = None
 
-    # Resume support
-    if os.path.exists(output_file):
+    # Resume support: the last written output plus pages fetched since
+    if os.path.exists(output_file) or os.path.exists(checkpoint):
+        with profiler.phase("load") as phase:
+            if os.path.exists(output_file):
+                all_listens = load_json(output_file)
+            if os.path.exists(checkpoint):
+                all_listens.extend(load_checkpoint(checkpoint))
+            phase.items = len(all_listens)
+
+    if args.verify or args.verify_all:
+        if not all_listens:
+            print(f"Nothing to verify: {output_file} is missing or empty.")
+            sys.exit(1)
+
+        with profiler.phase("verify") as phase:
+            missing = verify_export(username, token, all_listens, args.verify_all)
+            phase.items = len(missing)
+
+        if missing or os.path.exists(checkpoint):
+            all_listens.extend(missing)
+            all_listens.sort(key=lambda l: l["listened_at"], reverse=True)
+            with profiler.phase("write") as phase:
+                finish_output(output_file, all_listens)
+                phase.items = len(all_listens)
+            print(f"Added {len(missing)} listens. Total listens: {len(all_listens)}")
+
+        profiler.report()
+        return
+
+    if all_listens:
+        max_ts = min(l["listened_at"] for l in all_listens) - 1
         print("Resuming previous export...")
-        with open(output_file) as f:
-            all_listens = json.load(f)
-        if all_listens:
-            max_ts = min(l["listened_at"] for l in all_listens) - 1
-            print(f"Resuming from timestamp: {max_ts}")
+        print(f"Resuming from timestamp: {max_ts}")
 
     while True:
-        retries = 0
+        with profiler.phase("fetch") as phase:
+            data = with_retries(fetch_batch, username, token, max_ts)
+            if data is not None:
+                phase.items = len(data["payload"]["listens"])
 
-        while retries < MAX_RETRIES:
-            try:
-                data = fetch_batch(username, token, max_ts)
-                break
-            except Exception as e:
-                retries += 1
-                wait = 2 ** retries
-                print(f"Error: {e}")
-                print(f"Retrying in {wait}s ({retries}/{MAX_RETRIES})...")
-                time.sleep(wait)
-
-        if retries == MAX_RETRIES:
+        if data is None:
             print("Max retries exceeded. Exiting.")
+            if os.path.exists(checkpoint):
+                print(f"Progress saved in {checkpoint}; re-run the same command to resume.")
+            profiler.report()
             sys.exit(1)
 
         listens = data["payload"]["listens"]
@@ -102,13 +343,22 @@ def main():
 
         print(f"Fetched total: {len(all_listens)} listens")
 
-        safe_write_json(output_file, all_listens)
+        with profiler.phase("checkpoint") as phase:
+            append_checkpoint(checkpoint, listens)
+            phase.items = len(listens)
 
         time.sleep(SLEEP_BETWEEN_REQUESTS)
 
+    if os.path.exists(checkpoint):
+        with profiler.phase("write") as phase:
+            finish_output(output_file, all_listens)
+            phase.items = len(all_listens)
+
     print("Export complete.")
     print(f"Total listens exported: {len(all_listens)}")
 
+    profiler.report()
+
 
 if __name__ == "__main__":
     main()
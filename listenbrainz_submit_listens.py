@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+
+"""
+ListenBrainz Batched Submission Script
+
+Submits cleaned listens to ListenBrainz with "import" submit-listens
+requests. Accepts a ListenBrainz export JSON (e.g. a pruned
+USER_full.json) or the output of spotify_filter.py.
+
+- Listens are packed into payloads as close to the API limits as
+  possible (1000 listens and 10240000 bytes per request).
+- Batches are sent concurrently over a pooled session; all workers
+  respect the X-RateLimit-* headers and back off together on 429.
+- Every acknowledged batch is appended to an on-disk journal. After a
+  crash, re-running the same command skips the acknowledged batches
+  and submits the rest. A batch acknowledged by the server but not yet
+  journaled when the process died is sent again; ListenBrainz ignores
+  the repeated listens.
+
+Usage:
+    python listenbrainz_submit_listens.py USER_full.json --token TOKEN
+
+Optional:
+    --journal file.jsonl      # default: INPUT.submit-journal.jsonl
+    --workers 4               # concurrent requests
+    --api-url URL             # e.g. a local stand-in endpoint for testing
+    --dry-run                 # pack and report batches without sending
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from compressed_io import load_json
+
+API = "https://api.listenbrainz.org/1"
+MAX_LISTENS_PER_REQUEST = 1000
+MAX_LISTEN_SIZE = 10240
+MAX_PAYLOAD_SIZE = MAX_LISTEN_SIZE * MAX_LISTENS_PER_REQUEST
+MAX_RETRIES = 5
+SUBMISSION_CLIENT = "prune-scrobbles"
+
+# Bytes of {"listen_type": "import", "payload": []} around the listens
+PAYLOAD_OVERHEAD = len(json.dumps({"listen_type": "import", "payload": []}))
+
+
+# --------------------------------------------------
+# Input
+# --------------------------------------------------
+
+def from_listenbrainz(listen):
+    """Submission listen from a ListenBrainz export listen."""
+    meta = listen.get("track_metadata", {})
+    track_metadata = {
+        "artist_name": meta.get("artist_name"),
+        "track_name": meta.get("track_name"),
+    }
+    if meta.get("release_name"):
+        track_metadata["release_name"] = meta["release_name"]
+    if meta.get("additional_info"):
+        track_metadata["additional_info"] = meta["additional_info"]
+    return {"listened_at": listen["listened_at"], "track_metadata": track_metadata}
+
+
+def from_spotify(entry):
+    """Submission listen from a Spotify Extended Streaming History entry."""
+    # ts is when playback ended
+    ended = datetime.strptime(entry["ts"], "%Y-%m-%dT%H:%M:%S%z").timestamp()
+    additional_info = {
+        "submission_client": SUBMISSION_CLIENT,
+        "music_service": "spotify.com",
+    }
+    if entry.get("spotify_track_uri"):
+        track_id = entry["spotify_track_uri"].rsplit(":", 1)[-1]
+        additional_info["spotify_id"] = f"https://open.spotify.com/track/{track_id}"
+
+    track_metadata = {
+        "artist_name": entry["master_metadata_album_artist_name"],
+        "track_name": entry["master_metadata_track_name"],
+        "additional_info": additional_info,
+    }
+    if entry.get("master_metadata_album_album_name"):
+        track_metadata["release_name"] = entry["master_metadata_album_album_name"]
+
+    return {
+        "listened_at": int(ended - entry.get("ms_played", 0) / 1000),
+        "track_metadata": track_metadata,
+    }
+
+
+def load_listens(path):
+    """Load listens from a ListenBrainz export or Spotify history JSON."""
+    data = load_json(path)
+
+    if data and "listened_at" not in data[0] and "ms_played" in data[0]:
+        return [from_spotify(entry) for entry in data]
+    return [from_listenbrainz(listen) for listen in data]
+
+
+def pack_batches(listens, max_count=MAX_LISTENS_PER_REQUEST, max_size=MAX_PAYLOAD_SIZE):
+    """
+    Yield (encoded listens, skipped) batches that fit one request.
+
+    Listens are encoded once; a batch is closed when adding the next
+    listen would exceed max_count listens or max_size bytes. Listens
+    larger than MAX_LISTEN_SIZE are rejected by the API, so they are
+    counted in skipped instead.
+    """
+    batch = []
+    size = PAYLOAD_OVERHEAD
+    skipped = 0
+
+    for listen in listens:
+        encoded = json.dumps(listen, ensure_ascii=False, separators=(",", ":"))
+        length = len(encoded.encode("utf-8"))
+
+        if length > MAX_LISTEN_SIZE:
+            skipped += 1
+            continue
+
+        if batch and (len(batch) >= max_count or size + length + 1 > max_size):
+            yield batch, skipped
+            batch = []
+            size = PAYLOAD_OVERHEAD
+            skipped = 0
+
+        batch.append(encoded)
+        size += length + (1 if len(batch) > 1 else 0)
+
+    if batch or skipped:
+        yield batch, skipped
+
+
+def encode_payload(batch):
+    return ('{"listen_type":"import","payload":[' + ",".join(batch) + "]}").encode("utf-8")
+
+
+# --------------------------------------------------
+# Journal
+# --------------------------------------------------
+
+class Journal:
+    """Append-only record of acknowledged batches (JSON Lines)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.acknowledged = {}
+        self.lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn final line from a crash mid-write
+                        continue
+                    self.acknowledged[entry["batch"]] = entry["sha1"]
+
+        self.file = open(path, "a")
+
+    def record(self, index, sha1, count):
+        with self.lock:
+            self.file.write(json.dumps({"batch": index, "sha1": sha1, "count": count}) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.acknowledged[index] = sha1
+
+    def close(self):
+        self.file.close()
+
+
+# --------------------------------------------------
+# Client
+# --------------------------------------------------
+
+class RateLimiter:
+    """Shared view of the X-RateLimit-* headers across worker threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.remaining = None
+        self.reset_at = 0.0
+
+    def wait(self):
+        while True:
+            with self.lock:
+                delay = self.reset_at - time.monotonic() if self.remaining == 0 else 0
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def update(self, headers, limited=False):
+        reset_in = headers.get("X-RateLimit-Reset-In")
+        remaining = headers.get("X-RateLimit-Remaining")
+
+        with self.lock:
+            if limited or remaining is not None:
+                self.remaining = 0 if limited else int(remaining)
+            if reset_in is not None and self.remaining == 0:
+                self.reset_at = time.monotonic() + float(reset_in) + 0.1
+            elif limited:
+                self.reset_at = time.monotonic() + 1.0
+
+
+class SubmitClient:
+
+    def __init__(self, token, api_url=API, workers=4):
+        self.url = f"{api_url.rstrip('/')}/submit-listens"
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Token {token}",
+            "Content-Type": "application/json",
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.rate_limiter = RateLimiter()
+
+    def submit(self, body):
+        retries = 0
+
+        while True:
+            self.rate_limiter.wait()
+            try:
+                response = self.session.post(self.url, data=body, timeout=60)
+            except requests.RequestException as e:
+                error = e
+            else:
+                if response.status_code == 429:
+                    self.rate_limiter.update(response.headers, limited=True)
+                    continue
+
+                self.rate_limiter.update(response.headers)
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    return
+                error = f"HTTP {response.status_code}"
+
+            retries += 1
+            if retries >= MAX_RETRIES:
+                raise RuntimeError(f"Max retries exceeded: {error}")
+            wait_s = 2 ** retries
+            print(f"Error: {error}")
+            print(f"Retrying in {wait_s}s ({retries}/{MAX_RETRIES})...")
+            time.sleep(wait_s)
+
+
+# --------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Submit cleaned listens to ListenBrainz.")
+    parser.add_argument("file", help="ListenBrainz export JSON or spotify-cleaned.json")
+    parser.add_argument("--token", help="ListenBrainz user token")
+    parser.add_argument("--journal", help="Journal of acknowledged batches (default: INPUT.submit-journal.jsonl)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent requests")
+    parser.add_argument("--api-url", default=API, help="API root (e.g. a local stand-in endpoint)")
+    parser.add_argument("--dry-run", action="store_true", help="Pack batches and report without submitting")
+
+    args = parser.parse_args()
+
+    if not args.dry_run and not args.token:
+        parser.error("--token is required unless --dry-run is given")
+
+    journal_path = args.journal or f"{args.file}.submit-journal.jsonl"
+
+    listens = load_listens(args.file)
+    print(f"Loaded listens: {len(listens)}")
+
+    journal = None if args.dry_run else Journal(journal_path)
+    client = None if args.dry_run else SubmitClient(args.token, args.api_url, args.workers)
+
+    submitted = 0
+    resumed = 0
+    skipped = 0
+    batches = 0
+    failed = None
+
+    def send(index, body, sha1, count):
+        client.submit(body)
+        journal.record(index, sha1, count)
+        return count
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        pending = set()
+
+        for index, (batch, oversized) in enumerate(pack_batches(listens)):
+            skipped += oversized
+            if not batch:
+                continue
+            batches += 1
+
+            body = encode_payload(batch)
+            sha1 = hashlib.sha1(body).hexdigest()
+
+            if args.dry_run:
+                print(f"Batch {index}: {len(batch)} listens, {len(body)} bytes")
+                continue
+
+            acknowledged = journal.acknowledged.get(index)
+            if acknowledged == sha1:
+                resumed += len(batch)
+                continue
+            if acknowledged is not None:
+                print(f"Journal {journal_path} does not match this input (batch {index}).")
+                print("Use a new --journal for a different input file.")
+                sys.exit(1)
+
+            # Keep a bounded number of batches in flight
+            if len(pending) >= args.workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        submitted += future.result()
+                    except Exception as e:
+                        failed = e
+                if failed:
+                    break
+
+            pending.add(pool.submit(send, index, body, sha1, len(batch)))
+            print(f"Queued batch {index} ({len(batch)} listens)")
+
+        for future in pending:
+            try:
+                submitted += future.result()
+            except Exception as e:
+                failed = e
+
+    if journal:
+        journal.close()
+
+    print("\n===== SUBMISSION RESULTS =====")
+    print(f"Batches:              {batches}")
+    print(f"Submitted listens:    {submitted}")
+    print(f"Already acknowledged: {resumed}")
+    print(f"Skipped (too large):  {skipped}")
+    print("==============================")
+
+    if failed:
+        print(f"Submission stopped: {failed}")
+        print("Re-run the same command to resume.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
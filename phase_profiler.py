@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+"""
+Phase Profiler
+
+Per-phase timing and memory instrumentation shared by the analyzers,
+the exporter and the filter scripts.
+
+Each script wraps its work in named phases (load, dedup, temporal,
+metadata, diversity, write, ...). With --profile the profiler records,
+for every phase:
+
+- Wall time
+- CPU time
+- Item throughput (items per wall-clock second)
+
+and prints a phase table at the end of the run. --profile-memory adds
+the peak traced memory (tracemalloc) of every phase. Tracing slows
+allocation-heavy phases far more than others, so times from a
+--profile-memory run are not comparable: take timings from a --profile
+run and memory from a separate --profile-memory run. Without either
+option the phases are no-ops.
+
+Options:
+    --profile                 # print the phase table (timings)
+    --profile-memory          # print the phase table with peak memory (timings inflated)
+    --cprofile PHASE          # also run cProfile over one phase
+    --cprofile-out FILE       # where to dump the cProfile stats (default: PHASE.prof)
+"""
+
+import cProfile
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Phase:
+    """Handle yielded by PhaseProfiler.phase(); set .items to record throughput."""
+
+    def __init__(self):
+        self.items = 0
+
+
+class PhaseProfiler:
+
+    def __init__(self, enabled=False, cprofile_phase=None, cprofile_out=None, memory=False):
+        self.enabled = enabled or memory or bool(cprofile_phase)
+        self.memory = memory
+        self.cprofile_phase = cprofile_phase
+        self.cprofile_out = cprofile_out or (f"{cprofile_phase}.prof" if cprofile_phase else None)
+        self.phases = {}
+        self._cprofile = cProfile.Profile() if cprofile_phase else None
+
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        handle = Phase()
+
+        if not self.enabled:
+            yield handle
+            return
+
+        stats = self.phases.setdefault(
+            name, {"wall": 0.0, "cpu": 0.0, "items": 0, "peak": 0, "calls": 0}
+        )
+        profiling = self._cprofile is not None and name == self.cprofile_phase
+
+        if self.memory:
+            tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiling:
+            self._cprofile.enable()
+
+        try:
+            yield handle
+        finally:
+            if profiling:
+                self._cprofile.disable()
+            stats["wall"] += time.perf_counter() - wall_start
+            stats["cpu"] += time.process_time() - cpu_start
+            if self.memory:
+                stats["peak"] = max(stats["peak"], tracemalloc.get_traced_memory()[1])
+            stats["items"] += handle.items
+            stats["calls"] += 1
+
+    def rows(self):
+        """Phase table as a list of dicts (for machine-readable output)."""
+        rows = []
+        for name, stats in self.phases.items():
+            wall = stats["wall"]
+            rows.append({
+                "phase": name,
+                "calls": stats["calls"],
+                "wall_s": round(wall, 4),
+                "cpu_s": round(stats["cpu"], 4),
+                "items": stats["items"],
+                "items_per_s": round(stats["items"] / wall) if wall and stats["items"] else None,
+                "peak_mb": round(stats["peak"] / 1024 / 1024, 2) if self.memory else None,
+            })
+        return rows
+
+    def report(self):
+        if not self.enabled:
+            return
+
+        print("\n==== PHASE PROFILE ====")
+        if self.memory:
+            print("(times measured under tracemalloc; run with --profile alone for timings)")
+        print(f"{'Phase':12} {'Calls':>6} {'Wall s':>9} {'CPU s':>9} {'Items':>10} {'Items/s':>11} {'Peak MB':>9}")
+
+        total_wall = 0.0
+        total_cpu = 0.0
+        for row in self.rows():
+            total_wall += row["wall_s"]
+            total_cpu += row["cpu_s"]
+            rate = "" if row["items_per_s"] is None else row["items_per_s"]
+            items = row["items"] or ""
+            peak = "" if row["peak_mb"] is None else f"{row['peak_mb']:.2f}"
+            print(
+                f"{row['phase']:12} {row['calls']:>6} {row['wall_s']:>9.3f} {row['cpu_s']:>9.3f} "
+                f"{items:>10} {rate:>11} {peak:>9}"
+            )
+        print(f"{'total':12} {'':>6} {total_wall:>9.3f} {total_cpu:>9.3f}")
+
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(self.cprofile_out)
+            print(f"\ncProfile of phase '{self.cprofile_phase}' (top 15 by cumulative time):")
+            pstats.Stats(self._cprofile).sort_stats("cumulative").print_stats(15)
+            print("Created:", self.cprofile_out)
+
+
+NO_PROFILE = PhaseProfiler()
+
+
+def add_profile_arguments(parser):
+    parser.add_argument("--profile", action="store_true", help="Print per-phase wall/CPU time and throughput")
+    parser.add_argument(
+        "--profile-memory", action="store_true",
+        help="Also trace per-phase peak memory (slows the run; timings are not comparable)",
+    )
+    parser.add_argument("--cprofile", metavar="PHASE", help="Run cProfile over one named phase")
+    parser.add_argument("--cprofile-out", metavar="FILE", help="cProfile stats output (default: PHASE.prof)")
+
+
+def profiler_from_args(args):
+    return PhaseProfiler(args.profile, args.cprofile, args.cprofile_out, args.profile_memory)
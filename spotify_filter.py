@@ -1,4 +1,9 @@
-import json
+import argparse
+from collections import Counter
+
+from compressed_io import load_json, write_json
+from duration_index import DurationIndex
+from phase_profiler import add_profile_arguments, profiler_from_args
 
 FILES = [
     "Streaming_History_Audio_2018-2020_0.json", # Change this file's name to the filename of your exported Spotify JSON file.
@@ -8,12 +13,26 @@ FILES = [
 MIN_MS = 30000  # 30 seconds
 # Change this duration to 5, 10, 15, 30, 45, or 60 seconds depending on how long you want scrobbles for skipped tracks.
 
+WHAT_IF_SECONDS = [5, 10, 15, 30, 45, 60]
+
+parser = argparse.ArgumentParser(description="Remove skipped tracks and podcasts from Spotify streaming history")
+parser.add_argument("files", nargs="*", default=FILES, help="Streaming history files (.json, .json.gz, .jsonl.zst, ...)")
+parser.add_argument("--output", default="spotify-cleaned.json", help="Output file; compressed/formatted by extension")
+parser.add_argument(
+    "--what-if", type=float, nargs="*", metavar="SECONDS",
+    help="Also report the skips removed at each of these thresholds (default: 5 10 15 30 45 60)",
+)
+add_profile_arguments(parser)
+args = parser.parse_args()
+
+profiler = profiler_from_args(args)
+
 all_entries = []
 
-for file in FILES:
-    with open(file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        all_entries.extend(data)
+with profiler.phase("load") as phase:
+    for file in args.files:
+        all_entries.extend(load_json(file))
+    phase.items = len(all_entries)
 
 print(f"Total raw entries: {len(all_entries)}")
 
@@ -21,24 +40,29 @@ cleaned = []
 removed_skips = 0
 removed_podcasts = 0
 removed_missing = 0
+played_ms = Counter()
 
-for entry in all_entries:
-    # Remove podcasts
-    if entry.get("episode_name") is not None:
-        removed_podcasts += 1
-        continue
+with profiler.phase("filter") as phase:
+    for entry in all_entries:
+        # Remove podcasts
+        if entry.get("episode_name") is not None:
+            removed_podcasts += 1
+            continue
 
-    # Remove missing metadata
-    if not entry.get("master_metadata_track_name") or not entry.get("master_metadata_album_artist_name"):
-        removed_missing += 1
-        continue
+        # Remove missing metadata
+        if not entry.get("master_metadata_track_name") or not entry.get("master_metadata_album_artist_name"):
+            removed_missing += 1
+            continue
 
-    # Remove skips
-    if entry.get("ms_played", 0) < MIN_MS:
-        removed_skips += 1
-        continue
+        # Remove skips
+        ms_played = entry.get("ms_played", 0)
+        played_ms[ms_played] += 1
+        if ms_played < MIN_MS:
+            removed_skips += 1
+            continue
 
-    cleaned.append(entry)
+        cleaned.append(entry)
+    phase.items = len(all_entries)
 
 print("\n===== FILTER RESULTS =====")
 print(f"Total original:      {len(all_entries)}")
@@ -48,7 +72,20 @@ print(f"Removed missing:     {removed_missing}")
 print(f"Final clean entries: {len(cleaned)}")
 print("==========================")
 
-with open("spotify-cleaned.json", "w", encoding="utf-8") as f:
-    json.dump(cleaned, f, indent=2)
+if args.what_if is not None:
+    # Every threshold is answered from one histogram of the music plays
+    durations = DurationIndex.from_histogram(played_ms)
+    print("\n===== SKIP THRESHOLDS =====")
+    print(f"{'Threshold':>10} {'Removed':>10} {'Kept':>10}")
+    for seconds in args.what_if or WHAT_IF_SECONDS:
+        removed = durations.count_lt(seconds)
+        print(f"{seconds:>9g}s {removed:>10} {len(durations) - removed:>10}")
+    print("===========================")
+
+with profiler.phase("write") as phase:
+    write_json(args.output, cleaned, indent=2)
+    phase.items = len(cleaned)
+
+print(f"\nCreated: {args.output}")
 
-print("\nCreated: spotify-cleaned.json")
+profiler.report()
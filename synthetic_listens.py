@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+
+"""
+Synthetic Listen Generator
+
+Deterministic generators for the three input formats used by the scripts
+in this repository, for testing and benchmarking at production scale:
+
+- spotify:        Spotify Extended Streaming History JSON
+- ytm:            Google Takeout YouTube watch-history.html
+- listenbrainz:   ListenBrainz export JSON (USER_full.json)
+
+Records are streamed to disk, so 10M-record files do not need to fit in
+memory. The same seed and rates always produce the same file.
+
+Tunable rates (probability per generated listen):
+    --dup-rate     exact duplicate of the previous listen
+    --skip-rate    played for less than 30 seconds (ListenBrainz: duration_ms
+                   is the time played, as in listens imported from Spotify)
+    --burst-rate   next listen follows within 0-5 seconds
+
+Usage:
+    python synthetic_listens.py listenbrainz -n 1000000 -o USER_full.json
+    python synthetic_listens.py spotify -n 100000 -o Streaming_History_Audio_0.json
+    python synthetic_listens.py ytm -n 100000 -o watch-history.html --seed 7
+    python synthetic_listens.py listenbrainz -n 1000000 -o USER_full.jsonl.zst   # compressed JSON Lines
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import uuid
+from datetime import datetime, UTC
+
+from compressed_io import is_jsonl, open_text
+
+START_TS = 1262304000          # 2010-01-01
+ARTIST_COUNT = 5000
+TRACKS_PER_ARTIST = 40
+CLIENTS = [
+    ("Pano Scrobbler", 0.35),
+    ("Web Scrobbler", 0.25),
+    ("ListenBrainz Importer", 0.15),
+    ("Spotify", 0.15),
+    (None, 0.10),
+]
+
+
+# --------------------------------------------------
+# Listen Events
+# --------------------------------------------------
+
+def generate_events(n, seed=0, dup_rate=0.01, skip_rate=0.15, burst_rate=0.02, newest_first=False):
+    """
+    Yield n synthetic listen events as dicts.
+
+    Each event has ts, artist, track, album, duration_ms, played_ms,
+    client and mbid. Timestamps walk forward from START_TS, or backward
+    from where a forward walk would end when newest_first is set (the
+    order of ListenBrainz and Takeout exports).
+    """
+    rng = random.Random(seed)
+    clients, weights = zip(*CLIENTS)
+
+    # Average step is roughly 4 minutes, so the walk covers about n * 240s
+    ts = START_TS + n * 240 if newest_first else START_TS
+    step = -1 if newest_first else 1
+
+    prev = None
+    for _ in range(n):
+        if prev is not None and rng.random() < dup_rate:
+            yield prev
+            continue
+
+        artist_id = min(int(rng.paretovariate(1.2)) - 1, ARTIST_COUNT - 1)
+        track_id = rng.randrange(TRACKS_PER_ARTIST)
+        duration_ms = rng.randint(90_000, 420_000)
+
+        if rng.random() < skip_rate:
+            played_ms = rng.randint(0, 29_999)
+        else:
+            played_ms = rng.randint(max(30_000, duration_ms // 2), duration_ms)
+
+        if rng.random() < burst_rate:
+            gap = rng.randint(0, 5)
+        else:
+            gap = played_ms // 1000 + int(rng.expovariate(1 / 30))
+            if rng.random() < 0.01:
+                gap += rng.randint(3600, 86400)
+
+        if prev is not None:
+            ts += step * gap
+
+        event = {
+            "ts": ts,
+            "artist": f"Artist {artist_id}",
+            "track": f"Track {artist_id}-{track_id}",
+            "album": f"Album {artist_id}-{track_id // 10}",
+            "duration_ms": duration_ms,
+            "played_ms": played_ms,
+            "client": rng.choices(clients, weights)[0],
+            "mbid": str(uuid.UUID(int=rng.getrandbits(128), version=4)) if rng.random() < 0.6 else None,
+        }
+        prev = event
+        yield event
+
+
+def stable_id(name):
+    """22-character id derived from a name (str hash() is salted per process)."""
+    return hashlib.md5(name.encode()).hexdigest()[:22]
+
+
+def write_json_array(path, records):
+    """
+    Stream records to path as a JSON array (or JSON Lines for .jsonl)
+    without holding them in memory; .gz/.zst paths are compressed.
+    """
+    jsonl = is_jsonl(path)
+    count = 0
+    with open_text(path, "w") as f:
+        if not jsonl:
+            f.write("[")
+        for record in records:
+            if count:
+                f.write("\n" if jsonl else ",\n")
+            f.write(json.dumps(record))
+            count += 1
+        f.write("\n" if jsonl else "]\n")
+    return count
+
+
+# --------------------------------------------------
+# Spotify Extended Streaming History
+# --------------------------------------------------
+
+def spotify_records(events, seed=0, podcast_rate=0.02):
+    rng = random.Random(seed + 1)
+    for e in events:
+        iso = datetime.fromtimestamp(e["ts"], UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+        podcast = rng.random() < podcast_rate
+        skipped = e["played_ms"] < 30_000
+        yield {
+            "ts": iso,
+            "platform": "android",
+            "ms_played": e["played_ms"],
+            "conn_country": "US",
+            "ip_addr": "192.0.2.1",
+            "master_metadata_track_name": None if podcast else e["track"],
+            "master_metadata_album_artist_name": None if podcast else e["artist"],
+            "master_metadata_album_album_name": None if podcast else e["album"],
+            "spotify_track_uri": None if podcast else f"spotify:track:{stable_id(e['track'])}",
+            "episode_name": f"Episode {e['track']}" if podcast else None,
+            "episode_show_name": f"Show {e['artist']}" if podcast else None,
+            "spotify_episode_uri": None,
+            "reason_start": "clickrow" if skipped else "trackdone",
+            "reason_end": "fwdbtn" if skipped else "trackdone",
+            "shuffle": rng.random() < 0.5,
+            "skipped": skipped,
+            "offline": False,
+            "offline_timestamp": None,
+            "incognito_mode": False,
+        }
+
+
+def generate_spotify(path, n, seed=0, **rates):
+    events = generate_events(n, seed, **rates)
+    return write_json_array(path, spotify_records(events, seed))
+
+
+# --------------------------------------------------
+# Google Takeout watch-history.html
+# --------------------------------------------------
+
+TAKEOUT_HEADER = (
+    '<html><head><meta charset="UTF-8"><title>Watch history</title></head>'
+    '<body><div class="mdl-grid">'
+)
+TAKEOUT_FOOTER = "</div></body></html>"
+TAKEOUT_CELL = (
+    '<div class="outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp">'
+    '<div class="mdl-grid">'
+    '<div class="header-cell mdl-cell mdl-cell--12-col">'
+    '<p class="mdl-typography--title">{header}<br></p></div>'
+    '<div class="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1">'
+    'Watched <a href="https://{host}/watch?v={video}">{title}</a><br>'
+    '<a href="https://www.youtube.com/channel/UC{channel_id}">{channel}</a><br>'
+    '{when}<br></div>'
+    '<div class="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1 mdl-typography--text-right"></div>'
+    '<div class="content-cell mdl-cell mdl-cell--12-col mdl-typography--caption">'
+    '<b>Products:</b><br> YouTube<br></div></div></div>'
+)
+
+
+def takeout_timestamp(ts):
+    """Takeout style 'Jan 5, 2023, 1:02:03 PM UTC' with a narrow no-break space before PM."""
+    dt = datetime.fromtimestamp(ts, UTC)
+    hour = dt.hour % 12 or 12
+    return f"{dt:%b} {dt.day}, {dt.year}, {hour}:{dt:%M:%S}\u202f{dt:%p} UTC"
+
+
+def takeout_cells(events, seed=0, video_rate=0.3):
+    rng = random.Random(seed + 2)
+    for e in events:
+        video = "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_", k=11))
+        channel_id = stable_id(e["artist"])
+        if rng.random() < video_rate:
+            header, host, channel = "YouTube", "www.youtube.com", f"{e['artist']} Vlogs"
+        elif rng.random() < 0.5:
+            header, host, channel = "YouTube Music", "music.youtube.com", f"{e['artist']} - Topic"
+        else:
+            header, host, channel = "YouTube", "www.youtube.com", f"{e['artist']} - Topic"
+        yield TAKEOUT_CELL.format(
+            header=header,
+            host=host,
+            video=video,
+            title=e["track"],
+            channel_id=channel_id,
+            channel=channel,
+            when=takeout_timestamp(e["ts"]),
+        )
+
+
+def generate_ytm(path, n, seed=0, **rates):
+    count = 0
+    events = generate_events(n, seed, newest_first=True, **rates)
+    with open_text(path, "w") as f:
+        f.write(TAKEOUT_HEADER)
+        for cell in takeout_cells(events, seed):
+            f.write(cell)
+            count += 1
+        f.write(TAKEOUT_FOOTER)
+    return count
+
+
+# --------------------------------------------------
+# ListenBrainz Export
+# --------------------------------------------------
+
+def listenbrainz_records(events, user="synthetic"):
+    for e in events:
+        # Skipped plays carry the time played, like Spotify imports (ms_played)
+        skipped = e["played_ms"] < 30_000
+        additional_info = {"duration_ms": e["played_ms"] if skipped else e["duration_ms"]}
+        if e["client"]:
+            additional_info["submission_client"] = e["client"]
+        if e["mbid"]:
+            additional_info["recording_mbid"] = e["mbid"]
+        yield {
+            "listened_at": e["ts"],
+            "inserted_at": e["ts"] + 60,
+            "user_name": user,
+            "track_metadata": {
+                "artist_name": e["artist"],
+                "track_name": e["track"],
+                "release_name": e["album"],
+                "additional_info": additional_info,
+            },
+        }
+
+
+def generate_listenbrainz(path, n, seed=0, user="synthetic", **rates):
+    events = generate_events(n, seed, newest_first=True, **rates)
+    return write_json_array(path, listenbrainz_records(events, user))
+
+
+GENERATORS = {
+    "spotify": generate_spotify,
+    "ytm": generate_ytm,
+    "listenbrainz": generate_listenbrainz,
+}
+
+
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic listening history")
+    parser.add_argument("format", choices=sorted(GENERATORS), help="Output format")
+    parser.add_argument("-n", "--records", type=int, default=10_000, help="Number of records")
+    parser.add_argument("-o", "--output", required=True, help="Output file")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--dup-rate", type=float, default=0.01, help="Exact duplicate rate")
+    parser.add_argument("--skip-rate", type=float, default=0.15, help="Skip (<30s played) rate")
+    parser.add_argument("--burst-rate", type=float, default=0.02, help="Rapid burst (0-5s gap) rate")
+    args = parser.parse_args()
+
+    count = GENERATORS[args.format](
+        args.output,
+        args.records,
+        args.seed,
+        dup_rate=args.dup_rate,
+        skip_rate=args.skip_rate,
+        burst_rate=args.burst_rate,
+    )
+    print(f"Created: {args.output} ({count} records)")
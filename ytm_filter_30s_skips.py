@@ -1,6 +1,10 @@
+import argparse
 import re
 from datetime import datetime
 
+from compressed_io import open_text
+from phase_profiler import add_profile_arguments, profiler_from_args
+
 # This is step 2.
 
 INPUT_FILE = "music-and-topic-history.html"
@@ -11,66 +15,84 @@ timestamp_pattern = re.compile(
     r'([A-Za-z]{3} \d{1,2}, \d{4}, \d{1,2}:\d{2}:\d{2} [AP]M [A-Z]+)'
 )
 
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    html = f.read()
+parser = argparse.ArgumentParser(description="Remove clustered skips from YouTube Music watch history")
+parser.add_argument("--input", default=INPUT_FILE, help="Input HTML (.html, .html.gz or .html.zst)")
+parser.add_argument("--output", default=OUTPUT_FILE, help="Output HTML; compressed by extension")
+add_profile_arguments(parser)
+args = parser.parse_args()
 
-entries = html.split('<div class="outer-cell')
+profiler = profiler_from_args(args)
 
-parsed = []
+with profiler.phase("load") as phase:
+    with open_text(args.input) as f:
+        html = f.read()
 
-for entry in entries:
-    if "Watched" not in entry:
-        continue
+    entries = html.split('<div class="outer-cell')
+    phase.items = len(entries)
 
-    entry = entry.replace("\u202f", " ")
+parsed = []
 
-    match = timestamp_pattern.search(entry)
-    if not match:
-        continue
+with profiler.phase("parse") as phase:
+    for entry in entries:
+        if "Watched" not in entry:
+            continue
 
-    try:
-        timestamp = datetime.strptime(
-            match.group(1),
-            "%b %d, %Y, %I:%M:%S %p %Z"
-        )
-        parsed.append((entry, timestamp))
-    except:
-        continue
+        entry = entry.replace("\u202f", " ")
 
-# Sort chronologically (oldest → newest)
-parsed.sort(key=lambda x: x[1])
+        match = timestamp_pattern.search(entry)
+        if not match:
+            continue
+
+        try:
+            timestamp = datetime.strptime(
+                match.group(1),
+                "%b %d, %Y, %I:%M:%S %p %Z"
+            )
+            parsed.append((entry, timestamp))
+        except:
+            continue
+    phase.items = len(entries)
 
 clusters_kept = []
 removed = 0
 
-if parsed:
-    cluster = [parsed[0]]
-
-    for current in parsed[1:]:
-        prev = cluster[-1]
-        gap = (current[1] - prev[1]).total_seconds()
-
-        if gap <= CLUSTER_WINDOW:
-            cluster.append(current)
-        else:
-            # keep last item of finished cluster
-            clusters_kept.append(cluster[-1])
-            removed += len(cluster) - 1
-            cluster = [current]
-
-    # finalize last cluster
-    clusters_kept.append(cluster[-1])
-    removed += len(cluster) - 1
-
-with open(OUTPUT_FILE, "w", encoding="utf-8") as out:
-    out.write("<html><body>\n")
-    for entry, _ in clusters_kept:
-        out.write('<div class="outer-cell' + entry)
-    out.write("\n</body></html>")
+with profiler.phase("dedup") as phase:
+    # Sort chronologically (oldest → newest)
+    parsed.sort(key=lambda x: x[1])
+
+    if parsed:
+        cluster = [parsed[0]]
+
+        for current in parsed[1:]:
+            prev = cluster[-1]
+            gap = (current[1] - prev[1]).total_seconds()
+
+            if gap <= CLUSTER_WINDOW:
+                cluster.append(current)
+            else:
+                # keep last item of finished cluster
+                clusters_kept.append(cluster[-1])
+                removed += len(cluster) - 1
+                cluster = [current]
+
+        # finalize last cluster
+        clusters_kept.append(cluster[-1])
+        removed += len(cluster) - 1
+    phase.items = len(parsed)
+
+with profiler.phase("write") as phase:
+    with open_text(args.output, "w") as out:
+        out.write("<html><body>\n")
+        for entry, _ in clusters_kept:
+            out.write('<div class="outer-cell' + entry)
+        out.write("\n</body></html>")
+    phase.items = len(clusters_kept)
 
 print("\n===== 10s CLUSTER FILTER RESULTS =====")
 print("Original entries: ", len(parsed))
 print("Removed as skips:", removed)
 print("Final entries:   ", len(clusters_kept))
 print("=======================================")
-print("Created:", OUTPUT_FILE)
+print("Created:", args.output)
+
+profiler.report()
@@ -1,44 +1,64 @@
+import argparse
 import re
 
+from compressed_io import open_text
+from phase_profiler import add_profile_arguments, profiler_from_args
+
 # This is step 1.
 
 INPUT_FILE = "watch-history.html" # import your Google Takeout YouTube watch history, put the file path here.
 OUTPUT_FILE = "music-and-topic-history.html" # name your output file here.
 
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    html = f.read()
+parser = argparse.ArgumentParser(description="Keep YouTube Music and Topic channel listens from watch history")
+parser.add_argument("--input", default=INPUT_FILE, help="Input HTML (.html, .html.gz or .html.zst)")
+parser.add_argument("--output", default=OUTPUT_FILE, help="Output HTML; compressed by extension")
+add_profile_arguments(parser)
+args = parser.parse_args()
+
+profiler = profiler_from_args(args)
 
-# Split into entries
-entries = html.split('<div class="outer-cell')
+with profiler.phase("load") as phase:
+    with open_text(args.input) as f:
+        html = f.read()
+
+    # Split into entries
+    entries = html.split('<div class="outer-cell')
+    phase.items = len(entries)
 
 kept = []
 scanned = 0
 
-for entry in entries:
-    scanned += 1
-
-    # Must contain Watched (ignore Viewed posts etc)
-    if "Watched" not in entry:
-        continue
-
-    # Keep if:
-    # 1) It is YouTube Music section
-    # OR
-    # 2) Channel name contains "- Topic"
-    if (
-        "YouTube Music" in entry
-        or "- Topic</a>" in entry
-    ):
-        kept.append(entry)
-
-with open(OUTPUT_FILE, "w", encoding="utf-8") as out:
-    out.write("<html><body>\n")
-    for entry in kept:
-        out.write('<div class="outer-cell' + entry)
-    out.write("\n</body></html>")
+with profiler.phase("filter") as phase:
+    for entry in entries:
+        scanned += 1
+
+        # Must contain Watched (ignore Viewed posts etc)
+        if "Watched" not in entry:
+            continue
+
+        # Keep if:
+        # 1) It is YouTube Music section
+        # OR
+        # 2) Channel name contains "- Topic"
+        if (
+            "YouTube Music" in entry
+            or "- Topic</a>" in entry
+        ):
+            kept.append(entry)
+    phase.items = scanned
+
+with profiler.phase("write") as phase:
+    with open_text(args.output, "w") as out:
+        out.write("<html><body>\n")
+        for entry in kept:
+            out.write('<div class="outer-cell' + entry)
+        out.write("\n</body></html>")
+    phase.items = len(kept)
 
 print("\n===== EXTRACTION RESULTS =====")
 print("Total scanned entries:", scanned)
 print("Music + Topic kept:", len(kept))
 print("==============================")
-print("Created: music-and-topic-history.html")
+print("Created:", args.output)
+
+profiler.report()